@@ -0,0 +1,62 @@
+"""
+Concurrency benchmark of AsyncDbDal.get_by_key, vs the sync DbDal called through a thread hop (asyncio.to_thread),
+with many concurrent coroutines, on an SQLite file DB.
+
+Run from the repository root:
+    python -m benchmarks.async_benchmark
+"""
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import pydantic
+import sqlmodel
+
+from db_dal.src.async_db_dal import AsyncDbDal
+from db_dal.src.db_dal import DbDal
+from db_dal.src.db_engine import connect_to_async_db_and_create_tables, connect_to_db_and_create_tables
+from pydantic_db_model.src.pydantic_db_model import generate_db_model
+
+
+CONCURRENCY_LEVELS = (1, 10, 100)
+REQUESTS = 2000
+RECORDS = 1000
+
+
+class AsyncBenchmarkModel(pydantic.BaseModel):
+    id: int = sqlmodel.Field(primary_key=True)
+    name: str = "name"
+    tags: list[str] = ["a", "b", "c"]
+
+
+generate_db_model(AsyncBenchmarkModel)
+
+
+async def requests_per_second(get_by_key: Callable[[int], Awaitable[AsyncBenchmarkModel]], concurrency: int) -> float:
+    async def worker(worker_index: int) -> None:
+        for request_index in range(worker_index, REQUESTS, concurrency):
+            await get_by_key(request_index % RECORDS)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return REQUESTS / (time.perf_counter() - start)
+
+
+async def main(db_path: Path) -> None:
+    sync_dal = DbDal(connect_to_db_and_create_tables(f"sqlite:///{db_path}"), AsyncBenchmarkModel)
+    sync_dal.add_list([AsyncBenchmarkModel(id=i) for i in range(RECORDS)], bulk=True)
+    async_engine = await connect_to_async_db_and_create_tables(f"sqlite+aiosqlite:///{db_path}")
+    async_dal = AsyncDbDal(async_engine, AsyncBenchmarkModel)
+    print(f"{'coroutines':>10} | {'AsyncDbDal req/sec':>18} | {'DbDal + to_thread req/sec':>25}")
+    for concurrency in CONCURRENCY_LEVELS:
+        async_rate = await requests_per_second(async_dal.get_by_key, concurrency)
+        thread_rate = await requests_per_second(lambda key: asyncio.to_thread(sync_dal.get_by_key, key), concurrency)
+        print(f"{concurrency:>10} | {async_rate:>18,.0f} | {thread_rate:>25,.0f}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as temp_dir:
+        asyncio.run(main(Path(temp_dir) / "async_benchmark.db"))
@@ -0,0 +1,61 @@
+"""
+Microbenchmark of pydantic <-> flat model conversion (convert.to_flat_model / convert.from_flat_model).
+
+Run from the repository root:
+    python -m benchmarks.convert_benchmark
+"""
+import timeit
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pydantic
+
+from pydantic_db_model.src.pydantic_to_flat.src import convert
+from pydantic_db_model.src.pydantic_to_flat.src.create_flat_model import create_flat_model
+
+
+FIELDS_COUNTS = (5, 20, 100)
+ROWS = 2000
+
+
+class Item(pydantic.BaseModel):
+    name: str = "item"
+    tags: list[str] = ["a", "b", "c"]
+
+
+def create_model_with_fields(fields_count: int) -> type[pydantic.BaseModel]:
+    """
+    Returns a pydantic model with fields_count fields: 4 of each 5 fields are flat and 1 is composite.
+    """
+    fields_types = (
+        (int, 1),
+        (str, "some text"),
+        (float, 0.5),
+        (datetime, datetime(2024, 1, 1, tzinfo=ZoneInfo("UTC"))),
+        (list[Item], [Item(), Item()]),
+    )
+    return pydantic.create_model(
+        f"Model{fields_count}Fields",
+        **{f"f{i}": fields_types[i % len(fields_types)] for i in range(fields_count)},
+    )
+
+
+def rows_per_second(func, rows: int) -> float:
+    return rows / min(timeit.repeat(func, number=1, repeat=3))
+
+
+def run_benchmark(fields_count: int) -> tuple[float, float]:
+    py_model = create_model_with_fields(fields_count)
+    flat_model = create_flat_model(py_model)
+    py_objs = [py_model() for _ in range(ROWS)]
+    flat_objs = [convert.to_flat_model(py_obj, flat_model) for py_obj in py_objs]
+    to_flat_rate = rows_per_second(lambda: [convert.to_flat_model(py_obj, flat_model) for py_obj in py_objs], ROWS)
+    from_flat_rate = rows_per_second(lambda: [convert.from_flat_model(flat_obj, py_model) for flat_obj in flat_objs], ROWS)
+    return to_flat_rate, from_flat_rate
+
+
+if __name__ == "__main__":
+    print(f"{'fields':>6} | {'to_flat_model rows/sec':>22} | {'from_flat_model rows/sec':>24}")
+    for count in FIELDS_COUNTS:
+        to_flat, from_flat = run_benchmark(count)
+        print(f"{count:>6} | {to_flat:>22,.0f} | {from_flat:>24,.0f}")
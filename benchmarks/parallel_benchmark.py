@@ -0,0 +1,50 @@
+"""
+Benchmark of DbDal's JSON import (add_json_list) & export (iter_json) of a nested model on an SQLite file DB:
+rows/sec converted in the DAL's process (inline), and by a DalProcessPool of 1, 2, 4 & 8 workers.
+The pool only scales up to the number of available cores.
+
+Run from the repository root:
+    python -m benchmarks.parallel_benchmark
+"""
+import os
+import tempfile
+import time
+from typing import Optional
+
+from benchmarks.suite import BenchNestedModel
+from db_dal.src.dal_process_pool import DalProcessPool
+from db_dal.src.db_dal import DbDal
+from db_dal.src.db_engine import connect_to_db_and_create_tables
+
+
+RECORDS_COUNT = 50_000
+WORKERS = (1, 2, 4, 8)
+
+
+def rows_per_second(workers: Optional[int], json_lines: list[bytes], db_dir: str) -> tuple[float, float]:
+    """
+    Returns the import & export rows/sec, converting inline (workers=None) or by a pool of workers.
+    """
+    process_pool = DalProcessPool(workers) if workers else None
+    dal = DbDal(connect_to_db_and_create_tables(f"sqlite:///{db_dir}/parallel.db"), BenchNestedModel, process_pool=process_pool)
+    dal.delete_all()
+    start = time.perf_counter()
+    assert dal.add_json_list(json_lines) == RECORDS_COUNT
+    import_rate = RECORDS_COUNT / (time.perf_counter() - start)
+    start = time.perf_counter()
+    assert sum(json_chunk.count(b"\n") for json_chunk in dal.iter_json({})) == RECORDS_COUNT
+    export_rate = RECORDS_COUNT / (time.perf_counter() - start)
+    if process_pool is not None:
+        process_pool.close()
+    dal.db_engine.dispose()
+    return import_rate, export_rate
+
+
+if __name__ == "__main__":
+    json_lines = [BenchNestedModel(id=i).model_dump_json().encode() for i in range(RECORDS_COUNT)]
+    print(f"{RECORDS_COUNT:,} records, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} | {'import rows/sec':>15} | {'export rows/sec':>15}")
+    with tempfile.TemporaryDirectory() as db_dir:
+        for workers in (None, *WORKERS):
+            import_rate, export_rate = rows_per_second(workers, json_lines, db_dir)
+            print(f"{workers or 'inline':>8} | {import_rate:>15,.0f} | {export_rate:>15,.0f}")
@@ -0,0 +1,63 @@
+"""
+Benchmark of full table scans (DbDal.get_all & DbDal.iter_all) on an SQLite file DB:
+rows/sec of reading & converting all the records of a table into pydantic objects,
+validated or trusted (built by model_construct).
+
+Run from the repository root:
+    python -m benchmarks.scan_benchmark
+"""
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import pydantic
+import sqlmodel
+
+from db_dal.src.db_dal import DbDal
+from db_dal.src.db_engine import connect_to_db_and_create_tables
+from pydantic_db_model.src.pydantic_db_model import generate_db_model
+
+
+RECORDS_COUNT = 100_000
+
+
+class Address(pydantic.BaseModel):
+    city: str = "Paris"
+    street: str = "Rue de Rivoli"
+    number: int = 1
+
+
+class ScanBenchmarkModel(pydantic.BaseModel):
+    id: int = sqlmodel.Field(primary_key=True)
+    name: str = "name"
+    score: float = 0.5
+    active: bool = True
+    created: datetime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    note: Optional[str] = None
+    address: Address = Address()
+    tags: list[str] = ["a", "b", "c"]
+
+
+generate_db_model(ScanBenchmarkModel, fixed_timezone="UTC")
+
+
+def scan_rows_per_second(dal: DbDal, scan: Callable[[DbDal], int]) -> float:
+    start = time.perf_counter()
+    rows_count = scan(dal)
+    assert rows_count == RECORDS_COUNT
+    return rows_count / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as db_dir:
+        dal = DbDal(connect_to_db_and_create_tables(f"sqlite:///{db_dir}/scan.db"), ScanBenchmarkModel)
+        dal.add_list([ScanBenchmarkModel(id=i) for i in range(RECORDS_COUNT)], bulk=True)
+        print(f"{'scan':>8} | {'validated rows/sec':>18} | {'trusted rows/sec':>16}")
+        for scan_name, scan in (
+                ("get_all", lambda dal, trusted: len(dal.get_all(trusted=trusted))),
+                ("iter_all", lambda dal, trusted: sum(1 for _ in dal.iter_all(trusted=trusted))),
+        ):
+            validated_rate = scan_rows_per_second(dal, lambda dal: scan(dal, False))
+            trusted_rate = scan_rows_per_second(dal, lambda dal: scan(dal, True))
+            print(f"{scan_name:>8} | {validated_rate:>18,.0f} | {trusted_rate:>16,.0f}")
@@ -0,0 +1,237 @@
+"""
+Benchmark suite of the flattening layer & DbDal, on SQLite (file & in-memory DBs), across model shapes:
+flat, wide (many fields), deeply nested & large lists.
+Each case is measured as rows/sec (best of --repeat runs), and the results are written as JSON,
+so runs of different commits can be compared (and gated on) by the compare command.
+
+Run from the repository root:
+    python -m benchmarks.suite run --output results.json
+    python -m benchmarks.suite compare base.json results.json --threshold 0.1
+compare exits with status 1 if any case got slower than its base by more than threshold (a fraction).
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+import pydantic
+import sqlmodel
+
+from db_dal.src.db_dal import DbDal
+from db_dal.src.db_engine import connect_to_db_and_create_tables
+from pydantic_db_model.src.pydantic_db_model import generate_db_model, pydantic_to_db_dict, db_rows_to_pydantic, db_select_columns
+
+
+DEFAULT_RECORDS = 10_000
+DEFAULT_REPEAT = 3
+KEY_LOOKUPS = 1000
+# Number of single get_by_key calls measured (each one is a DB round trip)
+DB_KINDS = ("memory", "file")
+
+
+class BenchFlatModel(pydantic.BaseModel):
+    id: int = sqlmodel.Field(primary_key=True)
+    name: str = "name"
+    score: float = 0.5
+    active: bool = True
+    created: datetime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+BenchWideModel = pydantic.create_model(
+    "BenchWideModel",
+    id=(int, sqlmodel.Field(primary_key=True)),
+    **{f"s{i}": (str, f"text {i}") for i in range(20)},
+    **{f"i{i}": (int, i) for i in range(20)},
+    **{f"f{i}": (float, i / 2) for i in range(10)},
+)
+
+
+class BenchLeaf(pydantic.BaseModel):
+    key: str = "leaf"
+    values: dict[str, int] = {"a": 1, "b": 2}
+
+
+class BenchBranch(pydantic.BaseModel):
+    name: str = "branch"
+    leaves: list[BenchLeaf] = [BenchLeaf(), BenchLeaf()]
+
+
+class BenchNestedModel(pydantic.BaseModel):
+    id: int = sqlmodel.Field(primary_key=True)
+    name: str = "name"
+    root: BenchBranch = BenchBranch()
+    branches: dict[str, BenchBranch] = {"left": BenchBranch(), "right": BenchBranch()}
+
+
+class BenchLargeListModel(pydantic.BaseModel):
+    id: int = sqlmodel.Field(primary_key=True)
+    name: str = "name"
+    values: list[int] = list(range(500))
+
+
+SHAPES: dict[str, type[pydantic.BaseModel]] = {
+    "flat": BenchFlatModel,
+    "wide": BenchWideModel,
+    "nested": BenchNestedModel,
+    "large_list": BenchLargeListModel,
+}
+for _model in SHAPES.values():
+    generate_db_model(_model, fixed_timezone="UTC")
+
+
+@dataclass
+class BenchmarkResult:
+    case: str
+    shape: str
+    db: str
+    # "memory" / "file", or "-" for cases without DB I/O
+    rows: int
+    rows_per_sec: float
+
+    @property
+    def id(self) -> str:
+        return f"{self.case}/{self.shape}/{self.db}"
+
+
+def measure(run: Callable[[], Any], rows: int, repeat: int, setup: Optional[Callable[[], Any]] = None) -> float:
+    """
+    Returns rows/sec of the fastest of repeat runs. setup (not timed) is called before each run.
+    """
+    best_time = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        best_time = min(best_time, time.perf_counter() - start)
+    return rows / best_time
+
+
+def conversion_results(shape: str, model: type[pydantic.BaseModel], records_count: int, repeat: int) -> list[BenchmarkResult]:
+    records = [model(id=i) for i in range(records_count)]
+    db_model = model.__db_model__
+    columns = db_select_columns(db_model)
+    rows = [tuple(db_dict[column.name] for column in columns) for db_dict in map(pydantic_to_db_dict, records)]
+    cases = {
+        "convert.to_db_dict": lambda: [pydantic_to_db_dict(record) for record in records],
+        "convert.from_db_rows": lambda: db_rows_to_pydantic(db_model, rows),
+        "convert.from_db_rows_trusted": lambda: db_rows_to_pydantic(db_model, rows, trusted=True),
+    }
+    return [BenchmarkResult(case, shape, "-", records_count, measure(run, records_count, repeat)) for case, run in cases.items()]
+
+
+def dal_results(shape: str, model: type[pydantic.BaseModel], db_kind: str, records_count: int, repeat: int) -> list[BenchmarkResult]:
+    with tempfile.TemporaryDirectory() as db_dir:
+        db_url = "sqlite:///:memory:" if db_kind == "memory" else f"sqlite:///{db_dir}/benchmark.db"
+        dal = DbDal(connect_to_db_and_create_tables(db_url), model)
+        records = [model(id=i) for i in range(records_count)]
+        keys = list(range(records_count))
+        lookup_keys = keys[::max(1, records_count // KEY_LOOKUPS)][:KEY_LOOKUPS]
+
+        def refill(records_subset: list[pydantic.BaseModel]) -> None:
+            dal.delete_all()
+            dal.add_list(records_subset, bulk=True)
+
+        cases: list[tuple[str, int, Callable[[], Any], Optional[Callable[[], Any]]]] = [
+            ("dal.add_list_bulk", records_count, lambda: dal.add_list(records, bulk=True), dal.delete_all),
+            ("dal.upsert_list", records_count, lambda: dal.upsert_list(records), lambda: refill(records[::2])),
+            ("dal.get_by_key", len(lookup_keys), lambda: [dal.get_by_key(key) for key in lookup_keys], lambda: refill(records)),
+            ("dal.get_by_keys_list", records_count, lambda: dal.get_by_keys_list(keys), None),
+            ("dal.get_all", records_count, dal.get_all, None),
+            ("dal.get_all_trusted", records_count, lambda: dal.get_all(trusted=True), None),
+            ("dal.iter_all", records_count, lambda: sum(1 for _ in dal.iter_all()), None),
+            ("dal.delete_by_keys_list", records_count, lambda: dal.delete_by_keys_list(keys), lambda: refill(records)),
+        ]
+        results = [
+            BenchmarkResult(case, shape, db_kind, rows, measure(run, rows, repeat, setup))
+            for case, rows, run, setup in cases
+        ]
+        dal.db_engine.dispose()
+        return results
+
+
+def run_suite(records_count: int, repeat: int, shapes: list[str]) -> dict[str, Any]:
+    results: list[BenchmarkResult] = []
+    for shape in shapes:
+        model = SHAPES[shape]
+        shape_results = conversion_results(shape, model, records_count, repeat)
+        for db_kind in DB_KINDS:
+            shape_results += dal_results(shape, model, db_kind, records_count, repeat)
+        for result in shape_results:
+            print(f"{result.id:<50} {result.rows_per_sec:>12,.0f} rows/sec", file=sys.stderr)  # Progress (stdout may be the JSON)
+        results += shape_results
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now(timezone.utc).isoformat(),
+            "records": records_count,
+            "repeat": repeat,
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+
+def compare(base: dict[str, Any], new: dict[str, Any], threshold: float) -> list[str]:
+    """
+    Prints the rows/sec ratios (new / base) of the cases of both runs, and returns the ids of the regressed cases:
+    slower than base by more than threshold.
+    """
+    if (base["meta"]["records"], base["meta"]["repeat"]) != (new["meta"]["records"], new["meta"]["repeat"]):
+        print("Warning: the runs used different --records / --repeat, so their rates are not directly comparable")
+    base_rates = {BenchmarkResult(**result).id: result["rows_per_sec"] for result in base["results"]}
+    regressions = []
+    print(f"{'case':<50} {'base':>12} {'new':>12} {'ratio':>7}")
+    for result in [BenchmarkResult(**result) for result in new["results"]]:
+        if result.id not in base_rates:
+            continue
+        ratio = result.rows_per_sec / base_rates[result.id]
+        regressed = ratio < 1 - threshold
+        if regressed:
+            regressions.append(result.id)
+        print(f"{result.id:<50} {base_rates[result.id]:>12,.0f} {result.rows_per_sec:>12,.0f} {ratio:>6.2f}x{' REGRESSED' if regressed else ''}")
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite and write its results as JSON")
+    run_parser.add_argument("--output", help="results JSON file (stdout by default)")
+    run_parser.add_argument("--records", type=int, default=DEFAULT_RECORDS)
+    run_parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    compare_parser = commands.add_parser("compare", help="compare two results JSON files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    if args.command == "run":
+        results_json = json.dumps(run_suite(args.records, args.repeat, args.shapes), indent=2)
+        if args.output:
+            with open(args.output, "w") as output_file:
+                output_file.write(results_json)
+        else:
+            print(results_json)
+    else:
+        with open(args.base) as base_file, open(args.new) as new_file:
+            regressed_cases = compare(json.load(base_file), json.load(new_file), args.threshold)
+        sys.exit(1 if regressed_cases else 0)
@@ -0,0 +1,51 @@
+"""
+Benchmark of DbDal.upsert_list native dialect upserts vs the session.merge() path, on SQLite.
+Half of the upserted records already exist in the table (updates), the other half are new (inserts).
+
+Run from the repository root:
+    python -m benchmarks.upsert_benchmark
+"""
+import time
+from typing import Callable
+
+import pydantic
+import sqlmodel
+
+from db_dal.src.db_dal import DbDal
+from db_dal.src.db_engine import connect_to_db_and_create_tables
+from pydantic_db_model.src.pydantic_db_model import generate_db_model
+
+
+RECORDS_COUNTS = (1000, 10000)
+
+
+class Item(pydantic.BaseModel):
+    name: str = "item"
+    tags: list[str] = ["a", "b", "c"]
+
+
+class UpsertBenchmarkModel(pydantic.BaseModel):
+    id: int = sqlmodel.Field(primary_key=True)
+    name: str = "name"
+    value: float = 0.5
+    items: list[Item] = [Item(), Item()]
+
+
+generate_db_model(UpsertBenchmarkModel)
+
+
+def upsert_rows_per_second(upsert: Callable[[DbDal, list[UpsertBenchmarkModel]], None], records_count: int) -> float:
+    dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), UpsertBenchmarkModel)
+    dal.add_list([UpsertBenchmarkModel(id=i) for i in range(0, records_count, 2)], bulk=True)
+    records = [UpsertBenchmarkModel(id=i, name="updated") for i in range(records_count)]
+    start = time.perf_counter()
+    upsert(dal, records)
+    return records_count / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    print(f"{'records':>7} | {'merge rows/sec':>14} | {'native rows/sec':>15}")
+    for count in RECORDS_COUNTS:
+        merge_rate = upsert_rows_per_second(DbDal._merge_list, count)
+        native_rate = upsert_rows_per_second(DbDal.upsert_list, count)
+        print(f"{count:>7} | {merge_rate:>14,.0f} | {native_rate:>15,.0f}")
@@ -0,0 +1,305 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Sequence
+
+import pydantic
+from sqlalchemy import ColumnElement, Select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from db_dal.src.dal_cache import DalCache
+from db_dal.src.dal_metrics import DalMetrics, DalOperation, NULL_OPERATION
+from db_dal.src.dal_transaction import current_dal_transaction
+from db_dal.src.db_dal_base import DbDalBase, DalPage, FilterArgs, DEFAULT_BATCH_SIZE
+from pydantic_db_model.src.pydantic_db_model import pydantic_to_db_model
+
+
+class AsyncDbDal[T: pydantic.BaseModel](DbDalBase[T]):
+    """
+    asyncio variant of DbDal, with the same methods (as coroutines), over an AsyncEngine (e.g. "sqlite+aiosqlite://").
+    See DbDal for the methods documentation.
+    """
+    def __init__(
+            self,
+            db_engine: AsyncEngine,
+            model: type[T],
+            cache: Optional[DalCache] = None,
+            trusted_reads: bool = False,
+            metrics: Optional[DalMetrics] = None,
+    ):
+        super().__init__(db_engine, model, cache, trusted_reads, metrics)
+
+    async def get_all(self, trusted: Optional[bool] = None) -> list[T]:
+        return await self.get_by_dict({}, trusted=trusted)
+
+    async def get_by_dict(
+            self,
+            args_dict: FilterArgs,
+            order_by: Optional[str] = None,
+            descending: bool = False,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+            where: Sequence[ColumnElement[bool]] = (),
+            trusted: Optional[bool] = None,
+    ) -> list[T]:
+        statement = self._ordered_select_statement(args_dict, order_by, descending, limit, offset, where)
+        with self._operation("get_by_dict") as operation:
+            async with self._session(operation) as session:
+                with operation.phase("sql"):
+                    rows = (await session.execute(statement)).all()
+                with operation.phase("convert"):
+                    records = self._to_records(rows, trusted)
+                operation.add_rows(rows_out=len(records))
+                return records
+
+    async def get_fields_by_dict(
+            self,
+            args_dict: FilterArgs,
+            fields: Sequence[str],
+            order_by: Optional[str] = None,
+            descending: bool = False,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+            where: Sequence[ColumnElement[bool]] = (),
+            as_model: bool = False,
+    ) -> list[dict[str, Any]] | list[T]:
+        statement = self._fields_select_statement(args_dict, fields, order_by, descending, limit, offset, where)
+        with self._operation("get_fields_by_dict") as operation:
+            async with self._session(operation) as session:
+                with operation.phase("sql"):
+                    rows = (await session.execute(statement)).all()
+                with operation.phase("convert"):
+                    records = self._to_fields_records(rows, fields, as_model)
+                operation.add_rows(rows_out=len(records))
+                return records
+
+    async def get_page(
+            self,
+            args_dict: FilterArgs,
+            page_size: int,
+            order_by: Optional[str] = None,
+            descending: bool = False,
+            page_token: Optional[str] = None,
+            trusted: Optional[bool] = None,
+    ) -> DalPage[T]:
+        statement, order_fields = self._page_statement(args_dict, page_size, order_by, descending, page_token)
+        with self._operation("get_page") as operation:
+            async with self._session(operation) as session:
+                with operation.phase("sql"):
+                    rows = (await session.execute(statement)).all()
+                with operation.phase("convert"):
+                    page = self._to_page(rows, page_size, order_fields, descending, trusted)
+                operation.add_rows(rows_out=len(page.records))
+                return page
+
+    def iter_all(self, chunk_size: int = DEFAULT_BATCH_SIZE, trusted: Optional[bool] = None) -> AsyncIterator[T]:
+        return self.iter_by_dict({}, chunk_size, trusted=trusted)
+
+    async def iter_by_dict(
+            self,
+            args_dict: FilterArgs,
+            chunk_size: int = DEFAULT_BATCH_SIZE,
+            where: Sequence[ColumnElement[bool]] = (),
+            trusted: Optional[bool] = None,
+    ) -> AsyncIterator[T]:
+        statement = self._select_statement(args_dict, where).execution_options(yield_per=chunk_size)
+        with self._operation("iter_by_dict") as operation:
+            async with self._session(operation) as session:
+                with operation.phase("sql"):
+                    result = await session.stream(statement)
+                async for rows in operation.timed_async(result.partitions(), "sql"):
+                    with operation.phase("convert"):
+                        records = self._to_records(rows, trusted)
+                    operation.add_rows(rows_out=len(records))
+                    for record in records:
+                        yield record
+
+    async def count(self, args_dict: Optional[FilterArgs] = None) -> int:
+        """
+        Returns the number of records matching args_dict (all records by default), counted by the DB.
+        """
+        return await self._execute_scalar("count", self._count_statement(args_dict or {}))
+
+    async def exists(self, args_dict: Optional[FilterArgs] = None) -> bool:
+        """
+        Returns True if any record matches args_dict, by a LIMIT 1 query (which stops at the first match).
+        """
+        return await self._execute_scalar("exists", self._exists_statement(args_dict or {})) is not None
+
+    async def min(self, field_name: str, args_dict: Optional[FilterArgs] = None) -> Any:
+        return await self.aggregate("min", field_name, args_dict)
+
+    async def max(self, field_name: str, args_dict: Optional[FilterArgs] = None) -> Any:
+        return await self.aggregate("max", field_name, args_dict)
+
+    async def sum(self, field_name: str, args_dict: Optional[FilterArgs] = None) -> Any:
+        return await self.aggregate("sum", field_name, args_dict)
+
+    async def aggregate(self, function: str, field_name: str, args_dict: Optional[FilterArgs] = None) -> Any:
+        """
+        Returns function ("min", "max" or "sum") of a flat field's values in the records matching args_dict,
+        computed by the DB. None if no record matches.
+        """
+        value = await self._execute_scalar(function, self._aggregate_statement(function, field_name, args_dict or {}))
+        return self._to_field_value(field_name, value)
+
+    async def count_by(self, field_name: str, args_dict: Optional[FilterArgs] = None) -> dict[Any, int]:
+        """
+        Returns the number of records matching args_dict for each value of a flat field (GROUP BY), ordered by value.
+        """
+        statement = self._count_by_statement(field_name, args_dict or {})
+        with self._operation("count_by") as operation:
+            async with self._session(operation) as session:
+                with operation.phase("sql"):
+                    rows = (await session.execute(statement)).all()
+        return {self._to_field_value(field_name, value): count for value, count in rows}
+
+    async def _execute_scalar(self, operation_name: str, statement: Select) -> Any:
+        with self._operation(operation_name) as operation:
+            async with self._session(operation) as session:
+                with operation.phase("sql"):
+                    return (await session.execute(statement)).scalar()
+
+    async def get_by_key(self, key: ..., trusted: Optional[bool] = None) -> T:
+        return (await self.get_by_keys_list([key], trusted=trusted))[0]
+
+    async def get_by_keys_list(
+            self,
+            keys_list: list[...],
+            raise_on_missing: bool = True,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            trusted: Optional[bool] = None,
+    ) -> list[Optional[T]]:
+        keys_tuples = self._keys_tuples(keys_list)
+        cached_records = self._cached_records(keys_tuples)
+        cache_generation = self._cache_generation()
+        missing_keys = [key for key in keys_tuples if key not in cached_records]
+        records: list[T] = []
+        with self._operation("get_by_keys_list") as operation:
+            if self.cache is not None:
+                operation.add_cache_lookups(hits=len(keys_tuples) - len(missing_keys), misses=len(missing_keys))
+            async with self._session(operation) as session:
+                for statement in self._select_by_keys_statements(missing_keys, batch_size):
+                    with operation.phase("sql"):
+                        rows = (await session.execute(statement)).all()
+                    with operation.phase("convert"):
+                        records.extend(self._to_records(rows, trusted))
+            operation.add_rows(rows_out=len(records))
+        self._cache_records(records, cache_generation)
+        return self._in_keys_order([*cached_records.values(), *records], keys_tuples, raise_on_missing)
+
+    async def add(self, record: T) -> None:
+        logging.debug("Adding record to DB: %s", record)
+        assert isinstance(record, self.model)
+        with self._operation("add") as operation:
+            async with self._session(operation) as session:
+                with operation.phase("convert"):
+                    db_record = pydantic_to_db_model(record)
+                with operation.phase("sql"):
+                    session.add(db_record)
+                    await self._commit(session)
+                operation.add_rows(rows_in=1)
+        self._invalidate_cached_records([record])
+        logging.debug("Record added to DB! \n")
+
+    async def add_list(self, records: list[T], bulk: bool = False, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        logging.debug("Adding %d records to DB:", len(records))
+        with self._operation("add_list") as operation:
+            async with self._session(operation) as session:
+                if bulk:
+                    for statement, rows in operation.timed(self._insert_statements(records, batch_size), "convert"):
+                        with operation.phase("sql"):
+                            await session.execute(statement, rows)
+                else:
+                    for record in records:
+                        assert isinstance(record, self.model)
+                        with operation.phase("convert"):
+                            db_record = pydantic_to_db_model(record)
+                        session.add(db_record)
+                with operation.phase("sql"):
+                    await self._commit(session)
+                operation.add_rows(rows_in=len(records))
+        self._invalidate_cached_records(records)
+        logging.debug("Records added to DB! \n")
+
+    async def upsert(self, record: T) -> None:
+        await self.upsert_list([record])
+
+    async def upsert_list(self, records: list[T], batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        if not self._supports_native_upsert():
+            await self._merge_list(records)
+            return
+        with self._operation("upsert_list") as operation:
+            async with self._session(operation) as session:
+                for statement, rows in operation.timed(self._upsert_statements(records, batch_size), "convert"):
+                    with operation.phase("sql"):
+                        await session.execute(statement, rows)
+                with operation.phase("sql"):
+                    await self._commit(session)
+                operation.add_rows(rows_in=len(records))
+        self._invalidate_cached_records(records)
+
+    async def _merge_list(self, records: list[T]) -> None:
+        with self._operation("upsert_list") as operation:
+            async with self._session(operation) as session:
+                for record in records:
+                    assert isinstance(record, self.model)
+                    with operation.phase("convert"):
+                        db_record = pydantic_to_db_model(record)
+                    with operation.phase("sql"):
+                        await session.merge(db_record)
+                with operation.phase("sql"):
+                    await self._commit(session)
+                operation.add_rows(rows_in=len(records))
+        self._invalidate_cached_records(records)
+
+    async def delete_by_dict(self, args_dict: FilterArgs) -> int:
+        with self._operation("delete_by_dict") as operation:
+            async with self._session(operation) as session:
+                with operation.phase("sql"):
+                    deleted_count = (await session.execute(self._delete_statement(args_dict))).rowcount
+                    await self._commit(session)
+        self._clear_cache()
+        return deleted_count
+
+    async def delete_all(self) -> int:
+        return await self.delete_by_dict({})
+
+    async def delete_record(self, record: T) -> int:
+        assert isinstance(record, self.model)
+        return await self.delete_by_keys_list([record])
+
+    async def delete_by_key(self, key: ...) -> int:
+        return await self.delete_by_keys_list([key])
+
+    async def delete_by_keys_list(self, keys_list: list[...], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        keys_tuples = self._keys_tuples(keys_list)
+        deleted_count = 0
+        with self._operation("delete_by_keys_list") as operation:
+            async with self._session(operation) as session:
+                with operation.phase("sql"):
+                    for statement in self._delete_by_keys_statements(keys_tuples, batch_size):
+                        deleted_count += (await session.execute(statement)).rowcount
+                    await self._commit(session)
+        self._invalidate_cached_keys(keys_tuples)
+        return deleted_count
+
+    @asynccontextmanager
+    async def _session(self, operation: DalOperation) -> AsyncIterator[AsyncSession]:
+        """
+        Returns the session of the enclosing async_dal_transaction block, or a new session.
+        When measured, a new session's connection is acquired first, timed as the session_wait phase.
+        """
+        if (transaction := current_dal_transaction(self.db_engine)) is not None:
+            yield transaction.session
+            return
+        async with AsyncSession(self.db_engine) as session:
+            if operation is not NULL_OPERATION:
+                with operation.phase("session_wait"):
+                    await session.connection()
+            yield session
+
+    async def _commit(self, session: AsyncSession) -> None:
+        if self._in_transaction():
+            await session.flush()
+        else:
+            await session.commit()
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Iterable, Optional
+
+import pydantic
+
+
+@dataclass
+class DalCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    # Records dropped to keep the cache within max_size (least recently used first)
+    expirations: int = 0
+    # Records dropped because their TTL passed
+
+
+class DalCache:
+    """
+    Thread safe read-through cache of DAL records by key, bounded by max_size (LRU eviction),
+    with an optional TTL (seconds). Pass it to DbDal to cache get_by_key & get_by_keys_list results.
+    The DAL invalidates it on its own writes. Writes done by other DAL instances or processes are only
+    picked up after the TTL.
+    Records are copied in and out of the cache, so callers can't change cached records.
+    """
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = None):
+        assert max_size > 0, f"{max_size=} must be positive"
+        self.max_size = max_size
+        self.ttl = ttl
+        self._records: OrderedDict[tuple, tuple[Optional[float], pydantic.BaseModel]] = OrderedDict()
+        self._stats = DalCacheStats()
+        self._generation = 0
+        # Incremented by every invalidation, so records read from the DB before an invalidation are not cached
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> DalCacheStats:
+        with self._lock:
+            return replace(self._stats)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get_many(self, keys: Iterable[tuple]) -> dict[tuple, pydantic.BaseModel]:
+        """
+        Returns the cached records of keys (the missing ones are left out).
+        """
+        found: dict[tuple, pydantic.BaseModel] = {}
+        with self._lock:
+            now = time.monotonic()
+            for key in keys:
+                expires_at, record = self._records.get(key, (None, None))
+                if record is not None and expires_at is not None and expires_at <= now:
+                    del self._records[key]
+                    self._stats.expirations += 1
+                    record = None
+                if record is None:
+                    self._stats.misses += 1
+                    continue
+                self._records.move_to_end(key)
+                self._stats.hits += 1
+                found[key] = record
+        return {key: record.model_copy(deep=True) for key, record in found.items()}
+
+    def put_many(self, records: dict[tuple, pydantic.BaseModel], generation: int) -> None:
+        """
+        Caches records (by key), unless the cache was invalidated since generation was read,
+        in which case the records might be stale.
+        """
+        records = {key: record.model_copy(deep=True) for key, record in records.items()}
+        with self._lock:
+            if generation != self._generation:
+                return
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            for key, record in records.items():
+                self._records[key] = (expires_at, record)
+                self._records.move_to_end(key)
+            while len(self._records) > self.max_size:
+                self._records.popitem(last=False)
+                self._stats.evictions += 1
+
+    def invalidate(self, keys: Iterable[tuple]) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._records.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._records.clear()
@@ -0,0 +1,113 @@
+import enum
+from datetime import date, datetime, time
+from functools import cache
+from typing import TYPE_CHECKING, Any, Optional, Sequence, TypedDict
+
+import pydantic
+import sqlalchemy
+from pydantic_core import to_json
+from sqlmodel import SQLModel
+
+if TYPE_CHECKING:
+    import pyarrow
+
+
+_BASE64_BYTES_ANNOTATIONS = {bytes: pydantic.Base64UrlBytes, Optional[bytes]: Optional[pydantic.Base64UrlBytes]}
+# NDJSON import types of bytes columns, which are exported as base64 (to_json's bytes_mode="base64" is URL safe)
+
+
+def db_rows_to_ndjson(column_names: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    """
+    Returns raw DB rows as NDJSON: a {column: value} JSON line per row.
+    JSON (composite fields) columns are written as their JSON strings, without decoding them, bytes columns as (URL safe) base64.
+    """
+    return b"".join(to_json(dict(zip(column_names, row)), bytes_mode="base64") + b"\n" for row in rows)
+
+
+def ndjson_to_db_rows(db_model: type[SQLModel], lines: Sequence[str | bytes]) -> list[dict[str, Any]]:
+    """
+    Returns the DB rows (column values dicts) of a batch of db_rows_to_ndjson lines, validated against the db_model columns
+    by a single call. Blank lines are skipped.
+    """
+    lines = [line.encode() if isinstance(line, str) else line for line in lines]
+    return _db_rows_adapter(db_model, base64_bytes=True).validate_json(b"[" + b",".join(line for line in lines if line.strip()) + b"]")
+
+
+def arrow_schema(columns: Sequence[sqlalchemy.Column]) -> "pyarrow.Schema":
+    """
+    Returns the Arrow schema of DB columns. JSON (composite fields) columns are strings, enums are stored by their values.
+    """
+    pyarrow = import_pyarrow()
+    return pyarrow.schema([pyarrow.field(column.name, _arrow_type(column), nullable=column.nullable) for column in columns])
+
+
+def db_rows_to_arrow(columns: Sequence[sqlalchemy.Column], rows: Sequence[Sequence[Any]]) -> "pyarrow.RecordBatch":
+    """
+    Returns raw DB rows (of columns) as an Arrow record batch (of arrow_schema(columns)), converted column by column.
+    """
+    pyarrow = import_pyarrow()
+    schema = arrow_schema(columns)
+    values_columns = list(zip(*rows)) if rows else [() for _ in columns]
+    arrays = [
+        pyarrow.array([_enum_value(value) for value in values] if isinstance(column.type, sqlalchemy.Enum) else values, field.type)
+        for column, field, values in zip(columns, schema, values_columns)
+    ]
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def arrow_to_db_rows(db_model: type[SQLModel], batch: "pyarrow.RecordBatch") -> list[dict[str, Any]]:
+    """
+    Returns the DB rows (column values dicts) of an Arrow record batch, validated against the db_model columns.
+    """
+    return _db_rows_adapter(db_model).validate_python(batch.to_pylist())
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError("Arrow IPC & Parquet export / import require pyarrow: pip install pyarrow") from error
+    return pyarrow
+
+
+@cache
+def _db_rows_adapter(db_model: type[SQLModel], base64_bytes: bool = False) -> pydantic.TypeAdapter:
+    # Validates column values dicts into the values written to the DB (e.g. datetime strings into datetimes),
+    # and base64 strings into the values of bytes columns if base64_bytes is set
+    columns = db_model.__table__.columns
+    annotations = {column.name: db_model.model_fields[column.name].annotation for column in columns}
+    if base64_bytes:
+        annotations = {name: _BASE64_BYTES_ANNOTATIONS.get(annotation, annotation) for name, annotation in annotations.items()}
+    return pydantic.TypeAdapter(list[TypedDict(f"{db_model.__name__}Row", annotations)])
+
+
+def _arrow_type(column: sqlalchemy.Column) -> "pyarrow.DataType":
+    pyarrow = import_pyarrow()
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        python_type = str  # sqlmodel's AutoString (of str & JSON columns) has no python_type
+    if issubclass(python_type, enum.Enum):
+        python_type = type(next(iter(python_type)).value)
+    if issubclass(python_type, bool):
+        return pyarrow.bool_()
+    if issubclass(python_type, int):
+        return pyarrow.int64()
+    if issubclass(python_type, float):
+        return pyarrow.float64()
+    if issubclass(python_type, datetime):
+        return pyarrow.timestamp("us", tz="UTC" if getattr(column.type, "timezone", False) else None)
+    if issubclass(python_type, date):
+        return pyarrow.date32()
+    if issubclass(python_type, time):
+        return pyarrow.time64("us")
+    if issubclass(python_type, bytes):
+        return pyarrow.large_binary()
+    assert issubclass(python_type, str), f"Column {column.name} of type {column.type} has no Arrow type"
+    return pyarrow.large_string()
+
+
+def _enum_value(value: Optional[enum.Enum]) -> Any:
+    return value.value if value is not None else None
@@ -0,0 +1,234 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Optional
+
+import pydantic
+import sqlalchemy
+from sqlalchemy import ColumnElement
+from sqlalchemy.types import TypeEngine
+
+from pydantic_db_model.src.json_sql import json_sql
+from pydantic_db_model.src.pydantic_to_flat.src import convert
+
+
+OPERATORS = ("eq", "ne", "gt", "ge", "lt", "le", "in", "between", "startswith", "is_null", "contains")
+# Conditions of a DalField. contains (an item of a list / sub-document) applies to composite (JSON) fields only
+_JSON_FIELD_OPERATORS = ("is_null", "contains")
+# The only conditions on a whole composite field. Its values are compared through JSON paths: DalField(name, *path)
+_JSON_PATH_TYPES: dict[type, TypeEngine] = {bool: sqlalchemy.Boolean(), int: sqlalchemy.Integer(), float: sqlalchemy.Float()}
+# Values at JSON paths are compared as text, unless compared to these types' values
+
+
+class DalFilter(ABC):
+    """
+    A filter expression, accepted by get_by_dict, iter_by_dict, delete_by_dict etc. instead of an args_dict.
+    Built from DalField conditions, combined by & (and) and | (or), or by all_of() / any_of():
+
+    (DalField("age").between(18, 30) & DalField("name").startswith("J")) | DalField("address", "city").in_(["Paris", "Rome"])
+
+    It's validated against the model (fields, operators & values) and compiled into a single SQL WHERE clause.
+    """
+    def __and__(self, other: "DalFilter") -> "DalFilter":
+        return all_of(self, other)
+
+    def __or__(self, other: "DalFilter") -> "DalFilter":
+        return any_of(self, other)
+
+    @abstractmethod
+    def field_names(self) -> set[str]:
+        pass
+
+    @abstractmethod
+    def compile(self, model: type[pydantic.BaseModel]) -> ColumnElement[bool]:
+        pass
+
+
+@dataclass(frozen=True)
+class FieldCondition(DalFilter):
+    field_name: str
+    operator: str
+    value: Any = None
+    path: tuple[str | int, ...] = ()
+    # JSON path (keys & list indexes) in a composite field
+
+    def field_names(self) -> set[str]:
+        return {self.field_name}
+
+    def compile(self, model: type[pydantic.BaseModel]) -> ColumnElement[bool]:
+        assert self.operator in OPERATORS, f"{self.operator=} must be one of {OPERATORS}"
+        assert self.field_name in model.model_fields, f"{self.field_name=} is not a field of {model.__name__}"
+        column = getattr(model.__db_model__, self.field_name)
+        is_json_field = self.field_name in convert.get_converter(model, model.__db_model__).json_field_names
+        if self.path:
+            assert is_json_field, f"{self.field_name} is not a composite (JSON) field, so it has no JSON path {self.path}"
+            assert self.operator != "contains", "contains applies to a whole composite field, not to a JSON path"
+            type_ = _json_path_type(self.value) if self.operator not in ("startswith", "is_null") else None
+            return _condition(json_sql.json_path(column, *self.path, type_=type_), self.operator, self.value)
+        if is_json_field:
+            assert self.operator in _JSON_FIELD_OPERATORS, (
+                f"{self.operator} can't be applied to composite field {self.field_name}: compare its values by DalField(name, *path)"
+            )
+            if self.operator == "contains":
+                return json_sql.json_contains(column, self.value)
+            # A None composite value is stored as the JSON null document, rather than an SQL NULL
+            is_null = sqlalchemy.or_(column.is_(None), sqlalchemy.cast(column, sqlalchemy.String()) == "null")
+            return is_null if self.value else sqlalchemy.not_(is_null)
+        assert self.operator != "contains", f"contains applies to composite (JSON) fields only, not to {self.field_name}"
+        return _condition(column, self.operator, self._validated_value(model))
+
+    def _validated_value(self, model: type[pydantic.BaseModel]) -> Any:
+        """
+        Returns the value validated as the field's type (e.g. a str into an enum), as a list of them for in & between.
+        """
+        if self.operator == "is_null":
+            assert isinstance(self.value, bool), f"is_null value {self.value!r} of {self.field_name} must be a bool"
+            return self.value
+        adapter = _field_adapter(model, self.field_name)
+        if self.operator in ("in", "between"):
+            values = list(self.value)
+            assert self.operator == "in" or len(values) == 2, f"between value {self.value!r} of {self.field_name} must be a (low, high) pair"
+            return [adapter.validate_python(value) for value in values]
+        value = adapter.validate_python(self.value)
+        assert self.operator != "startswith" or isinstance(value, str), f"startswith applies to str fields only, not to {self.field_name}"
+        return value
+
+
+@dataclass(frozen=True)
+class AllOf(DalFilter):
+    filters: tuple[DalFilter, ...]
+
+    def field_names(self) -> set[str]:
+        return set().union(*(dal_filter.field_names() for dal_filter in self.filters))
+
+    def compile(self, model: type[pydantic.BaseModel]) -> ColumnElement[bool]:
+        return sqlalchemy.and_(sqlalchemy.true(), *(dal_filter.compile(model) for dal_filter in self.filters))
+
+
+@dataclass(frozen=True)
+class AnyOf(DalFilter):
+    filters: tuple[DalFilter, ...]
+
+    def field_names(self) -> set[str]:
+        return set().union(*(dal_filter.field_names() for dal_filter in self.filters))
+
+    def compile(self, model: type[pydantic.BaseModel]) -> ColumnElement[bool]:
+        return sqlalchemy.or_(sqlalchemy.false(), *(dal_filter.compile(model) for dal_filter in self.filters))
+
+
+def all_of(*filters: DalFilter) -> AllOf:
+    """
+    Matches the records matching all filters (all records if there are none).
+    """
+    return AllOf(tuple(nested for dal_filter in filters for nested in (dal_filter.filters if isinstance(dal_filter, AllOf) else (dal_filter,))))
+
+
+def any_of(*filters: DalFilter) -> AnyOf:
+    """
+    Matches the records matching any of filters (none if there are none).
+    """
+    return AnyOf(tuple(nested for dal_filter in filters for nested in (dal_filter.filters if isinstance(dal_filter, AnyOf) else (dal_filter,))))
+
+
+class DalField:
+    """
+    Builds the conditions (FieldCondition filters) of a model field, or of the value at a JSON path of a composite field:
+    DalField("age") > 18, DalField("address", "city") == "Paris", DalField("tags").contains("new").
+    """
+    def __init__(self, field_name: str, *path: str | int):
+        self.field_name = field_name
+        self.path = path
+
+    def _condition(self, operator: str, value: Any = None) -> FieldCondition:
+        return FieldCondition(self.field_name, operator, value, self.path)
+
+    def __eq__(self, value: Any) -> FieldCondition:
+        return self._condition("eq", value)
+
+    def __ne__(self, value: Any) -> FieldCondition:
+        return self._condition("ne", value)
+
+    def __gt__(self, value: Any) -> FieldCondition:
+        return self._condition("gt", value)
+
+    def __ge__(self, value: Any) -> FieldCondition:
+        return self._condition("ge", value)
+
+    def __lt__(self, value: Any) -> FieldCondition:
+        return self._condition("lt", value)
+
+    def __le__(self, value: Any) -> FieldCondition:
+        return self._condition("le", value)
+
+    def in_(self, values: list[Any] | tuple[Any, ...] | set[Any]) -> FieldCondition:
+        return self._condition("in", tuple(values))
+
+    def between(self, low: Any, high: Any) -> FieldCondition:
+        """
+        Inclusive range: low <= value <= high.
+        """
+        return self._condition("between", (low, high))
+
+    def startswith(self, prefix: str) -> FieldCondition:
+        return self._condition("startswith", prefix)
+
+    def is_null(self, is_null: bool = True) -> FieldCondition:
+        return self._condition("is_null", is_null)
+
+    def contains(self, value: Any) -> FieldCondition:
+        """
+        A composite field contains value: an item of a list (or a sub-document, on PostgreSQL & MySQL). See json_sql.json_contains.
+        """
+        return self._condition("contains", value)
+
+
+def filter_clause(args: dict[str, Any] | DalFilter, model: type[pydantic.BaseModel]) -> Optional[ColumnElement[bool]]:
+    """
+    Returns the WHERE clause of an args_dict (fields equality) or a DalFilter, None for an empty args_dict.
+    """
+    if isinstance(args, DalFilter):
+        return args.compile(model)
+    assert isinstance(args, dict), f"{args=} must be an args_dict or a DalFilter"
+    if not args:
+        return None
+    return sqlalchemy.and_(*(getattr(model.__db_model__, key) == value for key, value in args.items()))
+
+
+def filter_field_names(args: dict[str, Any] | DalFilter) -> tuple[str, ...]:
+    return tuple(sorted(args.field_names() if isinstance(args, DalFilter) else args))
+
+
+def _condition(expression: ColumnElement, operator: str, value: Any) -> ColumnElement[bool]:
+    match operator:
+        case "eq":
+            return expression == value
+        case "ne":
+            return expression != value
+        case "gt":
+            return expression > value
+        case "ge":
+            return expression >= value
+        case "lt":
+            return expression < value
+        case "le":
+            return expression <= value
+        case "in":
+            return expression.in_(value)
+        case "between":
+            low, high = value
+            return expression.between(low, high)
+        case "startswith":
+            return expression.startswith(value, autoescape=True)
+        case "is_null":
+            return expression.is_(None) if value else expression.is_not(None)
+    raise AssertionError(f"Unsupported {operator=}")
+
+
+def _json_path_type(value: Any) -> Optional[TypeEngine]:
+    sample = next(iter(value), None) if isinstance(value, tuple) else value
+    return _JSON_PATH_TYPES.get(type(sample))
+
+
+@cache
+def _field_adapter(model: type[pydantic.BaseModel], field_name: str) -> pydantic.TypeAdapter:
+    return pydantic.TypeAdapter(model.model_fields[field_name].annotation)
@@ -0,0 +1,266 @@
+import threading
+import time
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, fields, replace
+from typing import AsyncIterator, Callable, Iterator
+
+
+PHASES = ("sql", "convert", "session_wait")
+# Timed parts of a DAL operation: statements execution & rows fetching, pydantic <-> DB rows conversion,
+# and waiting for a pooled connection (session acquisition)
+
+
+@dataclass
+class DalOperationEvent:
+    """
+    The measurements of a single DAL operation (method call), passed to the DalMetrics listeners.
+    """
+    model: str
+    operation: str
+    total_seconds: float = 0.0
+    sql_seconds: float = 0.0
+    convert_seconds: float = 0.0
+    session_wait_seconds: float = 0.0
+    rows_in: int = 0
+    # Records written to the DB
+    rows_out: int = 0
+    # Records read from the DB
+    cache_hits: int = 0
+    cache_misses: int = 0
+    error: bool = False
+
+
+@dataclass
+class DalOperationStats:
+    """
+    The accumulated measurements of all the calls of a DAL operation.
+    """
+    calls: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    sql_seconds: float = 0.0
+    convert_seconds: float = 0.0
+    session_wait_seconds: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    def add(self, event: DalOperationEvent) -> None:
+        self.calls += 1
+        self.errors += event.error
+        for field in fields(self):
+            if field.name not in ("calls", "errors"):
+                setattr(self, field.name, getattr(self, field.name) + getattr(event, field.name))
+
+
+class DalMetrics:
+    """
+    Thread safe registry of DAL operations measurements, by (model name, operation).
+    Pass it to DbDal / AsyncDbDal (several DALs can share one) to time their operations:
+    the SQL, conversion & session acquisition wait parts, rows in & out, and cache hits & misses.
+    Read the accumulated stats(), export them by prometheus_text(), or get every operation's
+    DalOperationEvent by add_listener(callback). Listeners are called in the DAL's thread, so they should be quick.
+    """
+    def __init__(self):
+        self._stats: dict[tuple[str, str], DalOperationStats] = {}
+        self._listeners: list[Callable[[DalOperationEvent], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[DalOperationEvent], None]) -> None:
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[DalOperationEvent], None]) -> None:
+        self._listeners.remove(listener)
+
+    def operation(self, model: str, operation: str) -> "DalOperation":
+        """
+        Returns a new DalOperation timer, reported to this registry when its with block ends.
+        """
+        return DalOperation(self, DalOperationEvent(model, operation))
+
+    def stats(self) -> dict[tuple[str, str], DalOperationStats]:
+        """
+        Returns a copy of the accumulated stats, by (model name, operation).
+        """
+        with self._lock:
+            return {key: replace(stats) for key, stats in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def prometheus_text(self, prefix: str = "dal") -> str:
+        """
+        Returns the accumulated stats in the Prometheus text exposition format (all of them counters),
+        e.g. to be served by a local /metrics endpoint.
+        """
+        samples: dict[str, list[str]] = {
+            f"{prefix}_operation_calls_total": [],
+            f"{prefix}_operation_errors_total": [],
+            f"{prefix}_operation_seconds_total": [],
+            f"{prefix}_rows_total": [],
+            f"{prefix}_cache_requests_total": [],
+        }
+        for (model, operation), stats in sorted(self.stats().items()):
+            labels = f'model="{model}",operation="{operation}"'
+            samples[f"{prefix}_operation_calls_total"].append(f"{{{labels}}} {stats.calls}")
+            samples[f"{prefix}_operation_errors_total"].append(f"{{{labels}}} {stats.errors}")
+            samples[f"{prefix}_operation_seconds_total"] += [
+                f'{{{labels},phase="{phase}"}} {getattr(stats, f"{phase}_seconds")}' for phase in ("total", *PHASES)
+            ]
+            samples[f"{prefix}_rows_total"] += [
+                f'{{{labels},direction="in"}} {stats.rows_in}', f'{{{labels},direction="out"}} {stats.rows_out}',
+            ]
+            samples[f"{prefix}_cache_requests_total"] += [
+                f'{{{labels},result="hit"}} {stats.cache_hits}', f'{{{labels},result="miss"}} {stats.cache_misses}',
+            ]
+        lines = []
+        for name, name_samples in samples.items():
+            lines.append(f"# TYPE {name} counter")
+            lines += [f"{name}{sample}" for sample in name_samples]
+        return "\n".join(lines) + "\n"
+
+    def _report(self, event: DalOperationEvent) -> None:
+        with self._lock:
+            self._stats.setdefault((event.model, event.operation), DalOperationStats()).add(event)
+        for listener in self._listeners:
+            listener(event)
+
+
+class _PhaseTimer:
+    """
+    Phases are exclusive: while a nested phase is timed (e.g. rows fetched inside a conversion pipeline),
+    the enclosing one is paused.
+    """
+    __slots__ = ("_event", "_attribute", "_start", "_active_timers")
+
+    def __init__(self, event: DalOperationEvent, phase: str, active_timers: list["_PhaseTimer"]):
+        self._event = event
+        self._attribute = f"{phase}_seconds"
+        self._start = 0.0
+        self._active_timers = active_timers
+        # The running timers of the operation, innermost last (shared by its phase timers)
+
+    def __enter__(self) -> None:
+        now = time.perf_counter()
+        if self._active_timers:
+            self._active_timers[-1]._add_time(now)
+        self._active_timers.append(self)
+        self._start = now
+
+    def __exit__(self, *exc_info) -> None:
+        now = time.perf_counter()
+        self._add_time(now)
+        self._active_timers.pop()
+        if self._active_timers:
+            self._active_timers[-1]._start = now
+
+    def _add_time(self, now: float) -> None:
+        setattr(self._event, self._attribute, getattr(self._event, self._attribute) + now - self._start)
+
+
+class DalOperation:
+    """
+    Measures a single DAL operation: used as a with block around it, with phase() blocks around its parts
+    and rows / cache counters added to its event. Reports the event to its DalMetrics when the block ends.
+    """
+    def __init__(self, metrics: DalMetrics, event: DalOperationEvent):
+        self.event = event
+        self._metrics = metrics
+        active_timers: list[_PhaseTimer] = []
+        self._phase_timers = {phase: _PhaseTimer(event, phase, active_timers) for phase in PHASES}
+        self._start = 0.0
+
+    def __enter__(self) -> "DalOperation":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.event.total_seconds = time.perf_counter() - self._start
+        self.event.error = exc_type is not None and not issubclass(exc_type, GeneratorExit)  # Not an error: an iterator closed early
+        self._metrics._report(self.event)
+
+    def phase(self, phase: str) -> AbstractContextManager[None]:
+        """
+        Returns a with block timer, adding its time to phase ("sql", "convert" or "session_wait").
+        """
+        return self._phase_timers[phase]
+
+    def timed[I](self, iterator: Iterator[I], phase: str) -> Iterator[I]:
+        """
+        Yields the items of iterator, adding the time spent producing each of them to phase.
+        """
+        timer = self._phase_timers[phase]
+        iterator = iter(iterator)
+        while True:
+            with timer:
+                item = next(iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    async def timed_async[I](self, iterator: AsyncIterator[I], phase: str) -> AsyncIterator[I]:
+        """
+        Async variant of timed().
+        """
+        timer = self._phase_timers[phase]
+        while True:
+            with timer:
+                item = await anext(iterator, _END)
+            if item is _END:
+                return
+            yield item
+
+    def add_rows(self, rows_in: int = 0, rows_out: int = 0) -> None:
+        self.event.rows_in += rows_in
+        self.event.rows_out += rows_out
+
+    def add_cache_lookups(self, hits: int, misses: int) -> None:
+        self.event.cache_hits += hits
+        self.event.cache_misses += misses
+
+
+class _NullOperation(DalOperation):
+    """
+    The DalOperation of DALs without metrics: measures nothing.
+    """
+    def __init__(self):
+        pass
+
+    def __enter__(self) -> "DalOperation":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+    def phase(self, phase: str) -> AbstractContextManager[None]:
+        return _NULL_PHASE_TIMER
+
+    def timed[I](self, iterator: Iterator[I], phase: str) -> Iterator[I]:
+        return iter(iterator)
+
+    def timed_async[I](self, iterator: AsyncIterator[I], phase: str) -> AsyncIterator[I]:
+        return iterator
+
+    def add_rows(self, rows_in: int = 0, rows_out: int = 0) -> None:
+        pass
+
+    def add_cache_lookups(self, hits: int, misses: int) -> None:
+        pass
+
+
+class _NullPhaseTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_PHASE_TIMER = _NullPhaseTimer()
+NULL_OPERATION: DalOperation = _NullOperation()
+# Shared by all the operations of DALs without metrics
+_END = object()
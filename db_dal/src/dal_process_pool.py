@@ -0,0 +1,76 @@
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import cache
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+import pydantic
+
+from pydantic_db_model.src.pydantic_db_model import db_rows_to_pydantic, pydantic_to_db_dict
+
+
+class DalProcessPool:
+    """
+    Opt-in process pool for the CPU bound pydantic <-> DB rows conversions of DbDal's JSON imports & exports
+    (add_json_list & iter_json), which a single process can't run on more than one core.
+    Batches are sent to the workers as plain JSON records or raw rows (no pydantic objects), and up to max_pending
+    of them are converted ahead, while the DAL runs its DB I/O. Results are returned in the batches order.
+    The workers import the models by reference, so they must be defined at module level.
+    Share one pool by several DALs, and close() it (or use it as a with block) when done.
+    """
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        # Batches converted ahead of the DAL's DB I/O: bounds the memory to max_pending batches
+        self._executor = ProcessPoolExecutor(self.workers)
+
+    def map[I, O](self, function: Callable[[I], O], batches: Iterable[I]) -> Iterator[O]:
+        """
+        Yields function(batch) of each batch (computed by the workers), in the batches order.
+        The pending batches are cancelled if the iterator is closed early.
+        """
+        pending: deque[Future[O]] = deque()
+        try:
+            for batch in batches:
+                pending.append(self._executor.submit(function, batch))
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self) -> None:
+        self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "DalProcessPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def json_records_to_db_rows(model: type[pydantic.BaseModel], json_records: Sequence[str | bytes]) -> list[dict[str, Any]]:
+    """
+    Returns the DB rows (see pydantic_to_db_dict) of a batch of JSON encoded model records, validated by a single call.
+    Blank records (e.g. NDJSON empty lines) are skipped.
+    """
+    lines = [record.encode() if isinstance(record, str) else record for record in json_records]
+    records = _records_adapter(model).validate_json(b"[" + b",".join(line for line in lines if line.strip()) + b"]")
+    return [pydantic_to_db_dict(record) for record in records]
+
+
+def db_rows_to_json_lines(model: type[pydantic.BaseModel], trusted: bool, rows: Sequence[Sequence[Any]]) -> bytes:
+    """
+    Returns the records of a batch of raw rows (see db_rows_to_pydantic) as NDJSON: a JSON line per record.
+    The records are built eagerly, since all their fields are serialized.
+    """
+    serializer = model.__pydantic_serializer__
+    records = db_rows_to_pydantic(model.__db_model__, rows, trusted, eager=True)
+    return b"".join(serializer.to_json(record) + b"\n" for record in records)
+
+
+@cache
+def _records_adapter(model: type[pydantic.BaseModel]) -> pydantic.TypeAdapter:
+    return pydantic.TypeAdapter(list[model])
@@ -0,0 +1,91 @@
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+import sqlmodel
+from sqlalchemy import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from db_dal.src.db_engine import SQLITE_BEGIN_IMMEDIATE
+
+
+@dataclass
+class DalTransaction:
+    """
+    The session shared by all the DAL calls (of DALs on db_engine) inside a dal_transaction block.
+    """
+    db_engine: Engine | AsyncEngine
+    session: sqlmodel.Session | AsyncSession
+    after_commit: list[Callable[[], None]] = field(default_factory=list)
+    # Called once the transaction is committed (e.g. DAL caches invalidation)
+
+
+_current_transaction: ContextVar[Optional[DalTransaction]] = ContextVar("dal_transaction", default=None)
+
+
+@contextmanager
+def dal_transaction(db_engine: Engine) -> Iterator[sqlmodel.Session]:
+    """
+    Unit of work: all the DbDal calls on db_engine inside the with block (of any DbDal instance, in the same thread
+    or context) share a single session & transaction, committed once when the block ends, or rolled back if it raises.
+    The DAL calls only flush their writes, so they are visible to the following calls of the block.
+
+    with dal_transaction(db_engine):
+        person = persons_dal.get_by_key("1")
+        persons_dal.upsert(person)
+        audit_dal.add(AuditModel(...))
+
+    A nested dal_transaction block opens a SAVEPOINT: if it raises, only its own writes are rolled back
+    (the outer block may catch the error and go on).
+    On SQLite the transaction begins by BEGIN IMMEDIATE: it waits for the DB write lock up front, so a read followed
+    by a write can't fail with "database is locked" when another connection wrote in between.
+    """
+    transaction = _current_transaction.get()
+    if transaction is not None:
+        assert transaction.db_engine is db_engine, "A nested dal_transaction must use the same db_engine"
+        with transaction.session.begin_nested():
+            yield transaction.session
+        return
+    with sqlmodel.Session(db_engine.execution_options(**{SQLITE_BEGIN_IMMEDIATE: True})) as session:
+        transaction = DalTransaction(db_engine, session)
+        token = _current_transaction.set(transaction)
+        try:
+            yield session
+            session.commit()
+        finally:
+            _current_transaction.reset(token)
+    for callback in transaction.after_commit:
+        callback()
+
+
+@asynccontextmanager
+async def async_dal_transaction(db_engine: AsyncEngine) -> AsyncIterator[AsyncSession]:
+    """
+    dal_transaction for AsyncDbDal calls. The calls of a transaction must not run concurrently
+    (e.g. by asyncio.gather), since they share a single session.
+    """
+    transaction = _current_transaction.get()
+    if transaction is not None:
+        assert transaction.db_engine is db_engine, "A nested async_dal_transaction must use the same db_engine"
+        async with transaction.session.begin_nested():
+            yield transaction.session
+        return
+    async with AsyncSession(db_engine.execution_options(**{SQLITE_BEGIN_IMMEDIATE: True})) as session:
+        transaction = DalTransaction(db_engine, session)
+        token = _current_transaction.set(transaction)
+        try:
+            yield session
+            await session.commit()
+        finally:
+            _current_transaction.reset(token)
+    for callback in transaction.after_commit:
+        callback()
+
+
+def current_dal_transaction(db_engine: Engine | AsyncEngine) -> Optional[DalTransaction]:
+    """
+    Returns the transaction of the enclosing dal_transaction block on db_engine, if any.
+    """
+    transaction = _current_transaction.get()
+    return transaction if transaction is not None and transaction.db_engine is db_engine else None
@@ -1,128 +1,517 @@
+import itertools
 import logging
-from typing import Any
+import os
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional, Sequence
 
 import pydantic
 import sqlmodel
-from sqlalchemy import Engine
+from sqlalchemy import Engine, ColumnElement, Select
 
-from pydantic_db_model.src.pydantic_db_model import db_model_to_pydantic, pydantic_to_db_model
-from pydantic_db_model.src.pydantic_to_flat.src.create_flat_model import PydanticFieldDefinition
+from db_dal.src.dal_cache import DalCache
+from db_dal.src.dal_columnar import arrow_schema, arrow_to_db_rows, db_rows_to_arrow, db_rows_to_ndjson, import_pyarrow, ndjson_to_db_rows
+from db_dal.src.dal_metrics import DalMetrics, DalOperation, NULL_OPERATION
+from db_dal.src.dal_process_pool import DalProcessPool, db_rows_to_json_lines, json_records_to_db_rows
+from db_dal.src.dal_transaction import current_dal_transaction
+from db_dal.src.db_dal_base import DbDalBase, DalKeyNotFoundError, DalPage, FilterArgs, DEFAULT_BATCH_SIZE
+from pydantic_db_model.src.pydantic_db_model import pydantic_to_db_model
 
 
-class DalKeyNotFoundError(Exception):
-    pass
+__all__ = ["DbDal", "DalKeyNotFoundError", "DalPage"]
+# DalKeyNotFoundError & DalPage are re-exported, so DAL users import them from db_dal
 
 
-class DbDal[T: pydantic.BaseModel]:
-    def __init__(self, db_engine: Engine, model: type[T]):
-        self.db_engine = db_engine
-        self.model = model
-        assert hasattr(model, "__db_model__"), f"Use generate_db_model({model.__name__}) after class definition to create and link it to a db_model"
-        self.key_fields = self.get_key_fields()
-        if len(self.key_fields) == 1:
-            self.key_field_name = list(self.key_fields.keys())[0]
+class DbDal[T: pydantic.BaseModel](DbDalBase[T]):
+    def __init__(
+            self,
+            db_engine: Engine,
+            model: type[T],
+            cache: Optional[DalCache] = None,
+            trusted_reads: bool = False,
+            metrics: Optional[DalMetrics] = None,
+            process_pool: Optional[DalProcessPool] = None,
+    ):
+        super().__init__(db_engine, model, cache, trusted_reads, metrics)
+        self.process_pool = process_pool
+        # Runs the conversions of add_json_list & iter_json in worker processes when set
 
-    def get_key_fields(self) -> dict[str, PydanticFieldDefinition]:
-        return {
-            field: (info.annotation, info)
-            for field, info in self.model.model_fields.items()
-            if getattr(info, "primary_key", None) is not None
-        }
+    def get_all(self, trusted: Optional[bool] = None) -> list[T]:
+        return self.get_by_dict({}, trusted=trusted)
 
-    def get_all(self) -> list[T]:
-        return self.get_by_dict({})
+    def get_by_dict(
+            self,
+            args_dict: FilterArgs,
+            order_by: Optional[str] = None,
+            descending: bool = False,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+            where: Sequence[ColumnElement[bool]] = (),
+            trusted: Optional[bool] = None,
+    ) -> list[T]:
+        """
+        Returns the records matching args_dict.
+        order_by (a field name) sorts them, limit & offset select a slice of them (in the DB).
+        where adds SQL where clauses, e.g. [dal.json_contains("hobbies", "hiking")] for native_json models.
+        For deep paging prefer get_page(), which costs the same for any page.
+        trusted builds the records by model_construct instead of validating them (JSON fields are still decoded),
+        for data written through this DAL (validated on write). None uses the DAL's trusted_reads (False by default).
+        The other read methods take the same trusted argument.
+        """
+        statement = self._ordered_select_statement(args_dict, order_by, descending, limit, offset, where)
+        with self._operation("get_by_dict") as operation, self._session(operation) as session:
+            with operation.phase("sql"):
+                rows = session.execute(statement).all()
+            with operation.phase("convert"):
+                records = self._to_records(rows, trusted)
+            operation.add_rows(rows_out=len(records))
+            return records
 
-    def get_by_dict(self, args_dict: dict[str, Any]) -> list[T]:
-        with sqlmodel.Session(self.db_engine) as session:
-            statement = sqlmodel.select(self.model.__db_model__)
-            for key, value in args_dict.items():
-                statement = statement.where(getattr(self.model.__db_model__, key) == value)
-            db_results = session.exec(statement).all()
-            assert isinstance(db_results, list)
-            return [db_model_to_pydantic(result) for result in db_results]
-
-    def get_by_key(self, key: ...) -> T:
-        def validate_key_fields(keys_dict: dict[str, Any]) -> None:
-            assert len(keys_dict) == len(self.key_fields)
-            for key, value in keys_dict.items():
-                assert isinstance(value, self.key_fields[key][0])
-
-        def get_one_by_dict(keys_dict: dict[str, Any]) -> T:
-            db_results = self.get_by_dict(keys_dict)
-            if not db_results:
-                raise DalKeyNotFoundError(f'Key {keys_dict} not found in {self.model.__db_model__.__tablename__} DB table')
-            assert len(db_results) == 1
-            return db_results[0]
-
-        def get_by_keys_dict(keys_dict: dict[str, Any]) -> T:
-            validate_key_fields(keys_dict)
-            return get_one_by_dict(keys_dict)
-
-        if isinstance(key, dict):
-            return get_by_keys_dict(key)
-        elif isinstance(key, pydantic.BaseModel):
-            return get_by_keys_dict(key.model_dump())
-        else:
-            assert hasattr(self, "key_field_name"), f"{self.model} has no single key field defined"
-            return get_by_keys_dict({self.key_field_name: key})
+    def get_fields_by_dict(
+            self,
+            args_dict: FilterArgs,
+            fields: Sequence[str],
+            order_by: Optional[str] = None,
+            descending: bool = False,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+            where: Sequence[ColumnElement[bool]] = (),
+            as_model: bool = False,
+    ) -> list[dict[str, Any]] | list[T]:
+        """
+        Returns only fields of the records matching args_dict (see get_by_dict), as {field: value} dicts,
+        or as partial models (built by model_construct, without validation, other fields keep their defaults) if as_model is set.
+        Only the fields columns are selected, and only their JSON values are decoded.
+        """
+        statement = self._fields_select_statement(args_dict, fields, order_by, descending, limit, offset, where)
+        with self._operation("get_fields_by_dict") as operation, self._session(operation) as session:
+            with operation.phase("sql"):
+                rows = session.execute(statement).all()
+            with operation.phase("convert"):
+                records = self._to_fields_records(rows, fields, as_model)
+            operation.add_rows(rows_out=len(records))
+            return records
+
+    def get_page(
+            self,
+            args_dict: FilterArgs,
+            page_size: int,
+            order_by: Optional[str] = None,
+            descending: bool = False,
+            page_token: Optional[str] = None,
+            trusted: Optional[bool] = None,
+    ) -> DalPage[T]:
+        """
+        Returns a page of up to page_size records matching args_dict, using keyset (seek) pagination:
+        the records are sorted by order_by (the key fields by default, which are also the tie breaker),
+        and the next page starts right after the last record of the previous one,
+        so any page costs the same as the first one.
+        order_by must be a key field or an indexed field.
+        Pass the returned next_page_token to get the next page. It is None on the last page.
+        """
+        statement, order_fields = self._page_statement(args_dict, page_size, order_by, descending, page_token)
+        with self._operation("get_page") as operation, self._session(operation) as session:
+            with operation.phase("sql"):
+                rows = session.execute(statement).all()
+            with operation.phase("convert"):
+                page = self._to_page(rows, page_size, order_fields, descending, trusted)
+            operation.add_rows(rows_out=len(page.records))
+            return page
+
+    def iter_all(self, chunk_size: int = DEFAULT_BATCH_SIZE, trusted: Optional[bool] = None) -> Iterator[T]:
+        return self.iter_by_dict({}, chunk_size, trusted=trusted)
+
+    def iter_by_dict(
+            self,
+            args_dict: FilterArgs,
+            chunk_size: int = DEFAULT_BATCH_SIZE,
+            where: Sequence[ColumnElement[bool]] = (),
+            trusted: Optional[bool] = None,
+    ) -> Iterator[T]:
+        """
+        Yields the matching records, fetched from a streamed (server side) cursor and converted lazily,
+        chunk_size rows at a time. Memory use is bounded by chunk_size, whatever the number of results.
+        The DB connection is released when the iterator is exhausted or closed.
+        """
+        statement = self._select_statement(args_dict, where).execution_options(yield_per=chunk_size)
+        with self._operation("iter_by_dict") as operation, self._session(operation) as session:
+            with operation.phase("sql"):
+                result = session.execute(statement)
+            for rows in operation.timed(result.partitions(), "sql"):
+                with operation.phase("convert"):
+                    records = self._to_records(rows, trusted)
+                operation.add_rows(rows_out=len(records))
+                yield from records
+
+    def iter_json(
+            self,
+            args_dict: FilterArgs,
+            chunk_size: int = DEFAULT_BATCH_SIZE,
+            where: Sequence[ColumnElement[bool]] = (),
+            trusted: Optional[bool] = None,
+    ) -> Iterator[bytes]:
+        """
+        Yields the matching records as NDJSON (a JSON line per record), a bytes block per chunk_size rows, e.g. for exports.
+        The rows are streamed as in iter_by_dict. With a process_pool they're converted by the workers,
+        while the next chunks are fetched.
+        """
+        convert_rows = partial(db_rows_to_json_lines, self.model, self.trusted_reads if trusted is None else trusted)
+        return self._export_batches("iter_json", args_dict, chunk_size, where, convert_rows, parallel=True)
+
+    def export_ndjson(
+            self,
+            output: BinaryIO,
+            args_dict: Optional[FilterArgs] = None,
+            chunk_size: int = DEFAULT_BATCH_SIZE,
+            where: Sequence[ColumnElement[bool]] = (),
+    ) -> int:
+        """
+        Writes the matching rows to output (a binary file) as NDJSON, in the flat __db_model__ columns layout:
+        a {column: value} line per row, with JSON composite columns copied as is (see dal_columnar).
+        No pydantic records are built, and the rows are streamed chunk_size at a time. Returns the number of exported rows.
+        Reload the rows by import_ndjson.
+        """
+        column_names = [column.name for column in self._select_columns]
+        rows_count = 0
+        for ndjson in self._export_batches("export_ndjson", args_dict or {}, chunk_size, where, partial(db_rows_to_ndjson, column_names)):
+            output.write(ndjson)
+            rows_count += ndjson.count(b"\n")
+        return rows_count
+
+    def export_arrow(
+            self,
+            output: str | os.PathLike | BinaryIO,
+            file_format: str = "arrow",
+            args_dict: Optional[FilterArgs] = None,
+            chunk_size: int = DEFAULT_BATCH_SIZE,
+            where: Sequence[ColumnElement[bool]] = (),
+    ) -> int:
+        """
+        export_ndjson in an Arrow IPC stream (file_format="arrow") or a Parquet file (file_format="parquet"),
+        a record batch (Parquet row group) per chunk. Requires pyarrow.
+        """
+        pyarrow = import_pyarrow()
+        assert file_format in ("arrow", "parquet"), f"{file_format=} must be 'arrow' or 'parquet'"
+        schema = arrow_schema(self._select_columns)
+        writer_type = pyarrow.ipc.RecordBatchStreamWriter if file_format == "arrow" else pyarrow.parquet.ParquetWriter
+        rows_count = 0
+        with writer_type(output, schema) as writer:
+            for batch in self._export_batches("export_arrow", args_dict or {}, chunk_size, where, partial(db_rows_to_arrow, self._select_columns)):
+                writer.write_batch(batch)
+                rows_count += batch.num_rows
+        return rows_count
+
+    def count(self, args_dict: Optional[FilterArgs] = None) -> int:
+        """
+        Returns the number of records matching args_dict (all records by default), counted by the DB.
+        """
+        return self._execute_scalar("count", self._count_statement(args_dict or {}))
+
+    def exists(self, args_dict: Optional[FilterArgs] = None) -> bool:
+        """
+        Returns True if any record matches args_dict, by a LIMIT 1 query (which stops at the first match).
+        """
+        return self._execute_scalar("exists", self._exists_statement(args_dict or {})) is not None
+
+    def min(self, field_name: str, args_dict: Optional[FilterArgs] = None) -> Any:
+        return self.aggregate("min", field_name, args_dict)
+
+    def max(self, field_name: str, args_dict: Optional[FilterArgs] = None) -> Any:
+        return self.aggregate("max", field_name, args_dict)
 
-    def get_by_keys_list(self, keys_list: list[...]) -> list[T]:
-        return [self.get_by_key(key) for key in keys_list]
+    def sum(self, field_name: str, args_dict: Optional[FilterArgs] = None) -> Any:
+        return self.aggregate("sum", field_name, args_dict)
+
+    def aggregate(self, function: str, field_name: str, args_dict: Optional[FilterArgs] = None) -> Any:
+        """
+        Returns function ("min", "max" or "sum") of a flat field's values in the records matching args_dict,
+        computed by the DB. None if no record matches.
+        """
+        value = self._execute_scalar(function, self._aggregate_statement(function, field_name, args_dict or {}))
+        return self._to_field_value(field_name, value)
+
+    def count_by(self, field_name: str, args_dict: Optional[FilterArgs] = None) -> dict[Any, int]:
+        """
+        Returns the number of records matching args_dict for each value of a flat field (GROUP BY), ordered by value.
+        """
+        statement = self._count_by_statement(field_name, args_dict or {})
+        with self._operation("count_by") as operation, self._session(operation) as session:
+            with operation.phase("sql"):
+                rows = session.execute(statement).all()
+        return {self._to_field_value(field_name, value): count for value, count in rows}
+
+    def _execute_scalar(self, operation_name: str, statement: Select) -> Any:
+        with self._operation(operation_name) as operation, self._session(operation) as session:
+            with operation.phase("sql"):
+                return session.execute(statement).scalar()
+
+    def get_by_key(self, key: ..., trusted: Optional[bool] = None) -> T:
+        return self.get_by_keys_list([key], trusted=trusted)[0]
+
+    def get_by_keys_list(
+            self,
+            keys_list: list[...],
+            raise_on_missing: bool = True,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+            trusted: Optional[bool] = None,
+    ) -> list[Optional[T]]:
+        """
+        Returns the records of keys_list, in the same order.
+        The records are fetched by a single query for each chunk of up to batch_size keys
+        (WHERE key IN (...), or a tuple IN for composite keys).
+        Missing keys are reported together: by a single DalKeyNotFoundError if raise_on_missing is set,
+        otherwise by None in their places.
+        """
+        keys_tuples = self._keys_tuples(keys_list)
+        cached_records = self._cached_records(keys_tuples)
+        cache_generation = self._cache_generation()
+        missing_keys = [key for key in keys_tuples if key not in cached_records]
+        records: list[T] = []
+        with self._operation("get_by_keys_list") as operation:
+            if self.cache is not None:
+                operation.add_cache_lookups(hits=len(keys_tuples) - len(missing_keys), misses=len(missing_keys))
+            with self._session(operation) as session:
+                for statement in self._select_by_keys_statements(missing_keys, batch_size):
+                    with operation.phase("sql"):
+                        rows = session.execute(statement).all()
+                    with operation.phase("convert"):
+                        records.extend(self._to_records(rows, trusted))
+            operation.add_rows(rows_out=len(records))
+        self._cache_records(records, cache_generation)
+        return self._in_keys_order([*cached_records.values(), *records], keys_tuples, raise_on_missing)
 
     def add(self, record: T) -> None:
-        logging.debug(f"Adding record to DB: {record}")
+        logging.debug("Adding record to DB: %s", record)
         assert isinstance(record, self.model)
-        with sqlmodel.Session(self.db_engine) as session:
-            session.add(pydantic_to_db_model(record))
-            session.commit()
+        with self._operation("add") as operation, self._session(operation) as session:
+            with operation.phase("convert"):
+                db_record = pydantic_to_db_model(record)
+            with operation.phase("sql"):
+                session.add(db_record)
+                self._commit(session)
+            operation.add_rows(rows_in=1)
+        self._invalidate_cached_records([record])
         logging.debug("Record added to DB! \n")
 
-    def add_list(self, records: list[T]) -> None:
-        logging.debug(f"Adding {len(records)} records to DB:")
-        with sqlmodel.Session(self.db_engine) as session:
-            for record in records:
-                assert isinstance(record, self.model)
-                session.add(pydantic_to_db_model(record))
-            session.commit()
+    def add_list(self, records: list[T], bulk: bool = False, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        """
+        Adds all records in a single transaction.
+        When bulk is set, the records are converted straight into column dicts (no db_model instances)
+        and inserted by executemany INSERT statements of up to batch_size rows each, skipping the ORM unit of work.
+        """
+        logging.debug("Adding %d records to DB:", len(records))
+        with self._operation("add_list") as operation, self._session(operation) as session:
+            if bulk:
+                for statement, rows in operation.timed(self._insert_statements(records, batch_size), "convert"):
+                    with operation.phase("sql"):
+                        session.execute(statement, rows)
+            else:
+                for record in records:
+                    assert isinstance(record, self.model)
+                    with operation.phase("convert"):
+                        db_record = pydantic_to_db_model(record)
+                    session.add(db_record)
+            with operation.phase("sql"):
+                self._commit(session)
+            operation.add_rows(rows_in=len(records))
+        self._invalidate_cached_records(records)
         logging.debug("Records added to DB! \n")
 
     def upsert(self, record: T) -> None:
-        assert isinstance(record, self.model)
-        with sqlmodel.Session(self.db_engine) as session:
-            session.merge(pydantic_to_db_model(record))
-            session.commit()
+        self.upsert_list([record])
 
-    def upsert_list(self, records: list[T]) -> None:
-        with sqlmodel.Session(self.db_engine) as session:
+    def upsert_list(self, records: list[T], batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        """
+        Inserts new records and updates existing ones (by key fields), in a single transaction.
+        On SQLite, PostgreSQL & MySQL each chunk of up to batch_size records is sent as a single executemany of
+        INSERT ... ON CONFLICT DO UPDATE (ON DUPLICATE KEY UPDATE on MySQL), without selecting the records first.
+        Other DBs fall back to session.merge(), which selects each record by key before writing it.
+        """
+        if not self._supports_native_upsert():
+            self._merge_list(records)
+            return
+        with self._operation("upsert_list") as operation, self._session(operation) as session:
+            for statement, rows in operation.timed(self._upsert_statements(records, batch_size), "convert"):
+                with operation.phase("sql"):
+                    session.execute(statement, rows)
+            with operation.phase("sql"):
+                self._commit(session)
+            operation.add_rows(rows_in=len(records))
+        self._invalidate_cached_records(records)
+
+    def add_json_list(self, json_records: Iterable[str | bytes], upsert: bool = False, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Adds (or upserts) JSON encoded records, e.g. the lines of an NDJSON file, in a single transaction,
+        by executemany statements of up to batch_size records each. Returns the number of written records.
+        The records are validated and converted into DB rows in batches: by the workers of the process_pool when set,
+        while the previous batches are written.
+        """
+        convert_records = partial(json_records_to_db_rows, self.model)
+        return self._import_batches("add_json_list", itertools.batched(json_records, batch_size), convert_records, upsert, parallel=True)
+
+    def import_ndjson(self, lines: Iterable[str | bytes], upsert: bool = False, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Adds (or upserts) the rows of export_ndjson lines (e.g. a file opened in binary mode) in a single transaction,
+        batch_size rows at a time: the rows are validated against the __db_model__ columns and written as is
+        (JSON composite columns aren't decoded). Returns the number of imported rows.
+        """
+        convert_lines = partial(ndjson_to_db_rows, self.model.__db_model__)
+        return self._import_batches("import_ndjson", itertools.batched(lines, batch_size), convert_lines, upsert)
+
+    def import_arrow(
+            self,
+            source: str | os.PathLike | BinaryIO,
+            file_format: str = "arrow",
+            upsert: bool = False,
+            batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> int:
+        """
+        import_ndjson of an export_arrow Arrow IPC stream (file_format="arrow") or Parquet file (file_format="parquet"),
+        read batch_size rows at a time. Requires pyarrow.
+        """
+        pyarrow = import_pyarrow()
+        assert file_format in ("arrow", "parquet"), f"{file_format=} must be 'arrow' or 'parquet'"
+        if file_format == "parquet":
+            batches = pyarrow.parquet.ParquetFile(source).iter_batches(batch_size)
+        else:
+            batches = (
+                batch.slice(offset, batch_size)
+                for batch in pyarrow.ipc.open_stream(source)
+                for offset in range(0, batch.num_rows, batch_size)
+            )
+        return self._import_batches("import_arrow", batches, partial(arrow_to_db_rows, self.model.__db_model__), upsert)
+
+    def _export_batches[O](
+            self,
+            operation_name: str,
+            args_dict: FilterArgs,
+            chunk_size: int,
+            where: Sequence[ColumnElement[bool]],
+            convert: Callable[[list[tuple]], O],
+            parallel: bool = False,
+    ) -> Iterator[O]:
+        """
+        Yields convert(rows) of each chunk of the matching raw rows, streamed as in iter_by_dict.
+        When parallel is set, the chunks are converted by the process_pool (if any), while the next chunks are fetched.
+        """
+        statement = self._select_statement(args_dict, where).execution_options(yield_per=chunk_size)
+        rows_counts: deque[int] = deque()
+
+        def row_batches() -> Iterator[list[tuple]]:
+            for rows in operation.timed(result.partitions(), "sql"):
+                rows_counts.append(len(rows))
+                yield [tuple(row) for row in rows]
+
+        with self._operation(operation_name) as operation, self._session(operation) as session:
+            with operation.phase("sql"):
+                result = session.execute(statement)
+            converted_batches = self._convert_batches(convert, row_batches()) if parallel else map(convert, row_batches())
+            for converted in operation.timed(converted_batches, "convert"):
+                operation.add_rows(rows_out=rows_counts.popleft())
+                yield converted
+
+    def _import_batches[B](
+            self,
+            operation_name: str,
+            batches: Iterable[B],
+            convert: Callable[[B], list[dict[str, Any]]],
+            upsert: bool,
+            parallel: bool = False,
+    ) -> int:
+        """
+        Writes the DB rows of each batch (convert(batch)) in a single transaction, and returns their number.
+        When parallel is set, the batches are converted by the process_pool (if any), while the previous ones are written.
+        """
+        assert not upsert or self._supports_native_upsert(), f"{operation_name} upsert is not supported on {self.db_engine.dialect.name}"
+        rows_count = 0
+        with self._operation(operation_name) as operation, self._session(operation) as session:
+            converted_batches = self._convert_batches(convert, batches) if parallel else map(convert, batches)
+            for rows in operation.timed(converted_batches, "convert"):
+                rows_count += len(rows)
+                for statement, statement_rows in self._db_rows_statements(rows, upsert):
+                    with operation.phase("sql"):
+                        session.execute(statement, statement_rows)
+            with operation.phase("sql"):
+                self._commit(session)
+            operation.add_rows(rows_in=rows_count)
+        self._clear_cache()
+        logging.debug("%d rows written to DB by %s", rows_count, operation_name)
+        return rows_count
+
+    def _merge_list(self, records: list[T]) -> None:
+        with self._operation("upsert_list") as operation, self._session(operation) as session:
             for record in records:
                 assert isinstance(record, self.model)
-                session.merge(pydantic_to_db_model(record))
-            session.commit()
+                with operation.phase("convert"):
+                    db_record = pydantic_to_db_model(record)
+                with operation.phase("sql"):
+                    session.merge(db_record)
+            with operation.phase("sql"):
+                self._commit(session)
+            operation.add_rows(rows_in=len(records))
+        self._invalidate_cached_records(records)
 
-    def delete_by_dict(self, args_dict: dict) -> None:
-        with sqlmodel.Session(self.db_engine) as session:
-            statement = sqlmodel.delete(self.model.__db_model__)
-            for key, value in args_dict.items():
-                statement = statement.where(getattr(self.model.__db_model__, key) == value)
-            session.exec(statement)
-            session.commit()
+    def delete_by_dict(self, args_dict: FilterArgs) -> int:
+        """
+        Returns the number of deleted rows.
+        """
+        with self._operation("delete_by_dict") as operation, self._session(operation) as session:
+            with operation.phase("sql"):
+                deleted_count = session.execute(self._delete_statement(args_dict)).rowcount
+                self._commit(session)
+        self._clear_cache()
+        return deleted_count
 
-    def delete_all(self) -> None:
-        self.delete_by_dict({})
+    def delete_all(self) -> int:
+        return self.delete_by_dict({})
 
-    def delete_record(self, record: T) -> None:
+    def delete_record(self, record: T) -> int:
+        """
+        Deletes the record by its key fields only. Returns the number of deleted rows.
+        """
         assert isinstance(record, self.model)
-        self.delete_by_dict(pydantic_to_db_model(record).model_dump())
+        return self.delete_by_keys_list([record])
 
-    def delete_by_key(self, key: ...) -> None:
-        if isinstance(key, dict):
-            self.delete_by_dict(key)
-        elif isinstance(key, pydantic.BaseModel):
-            self.delete_by_dict(key.model_dump())
-        else:
-            assert hasattr(self, "key_field_name"), f"{self.model} has no single key field defined"
-            self.delete_by_dict({self.key_field_name: key})
+    def delete_by_key(self, key: ...) -> int:
+        return self.delete_by_keys_list([key])
+
+    def delete_by_keys_list(self, keys_list: list[...], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Deletes the records of keys_list in a single transaction,
+        by a single DELETE ... WHERE key IN (...) statement for each chunk of up to batch_size keys.
+        Returns the number of deleted rows.
+        """
+        keys_tuples = self._keys_tuples(keys_list)
+        deleted_count = 0
+        with self._operation("delete_by_keys_list") as operation, self._session(operation) as session:
+            with operation.phase("sql"):
+                for statement in self._delete_by_keys_statements(keys_tuples, batch_size):
+                    deleted_count += session.execute(statement).rowcount
+                self._commit(session)
+        self._invalidate_cached_keys(keys_tuples)
+        return deleted_count
 
-    def delete_by_keys_list(self, keys_list: list[...]) -> None:
-        for key in keys_list:
-            self.delete_by_key(key)
+    def _convert_batches[I, O](self, function: Callable[[I], O], batches: Iterable[I]) -> Iterator[O]:
+        return self.process_pool.map(function, batches) if self.process_pool is not None else map(function, batches)
+
+    @contextmanager
+    def _session(self, operation: DalOperation) -> Iterator[sqlmodel.Session]:
+        """
+        Returns the session of the enclosing dal_transaction block, or a new session.
+        When measured, a new session's connection is acquired first, timed as the session_wait phase.
+        """
+        if (transaction := current_dal_transaction(self.db_engine)) is not None:
+            yield transaction.session
+            return
+        with sqlmodel.Session(self.db_engine) as session:
+            if operation is not NULL_OPERATION:
+                with operation.phase("session_wait"):
+                    session.connection()
+            yield session
+
+    def _commit(self, session: sqlmodel.Session) -> None:
+        if self._in_transaction():
+            session.flush()
+        else:
+            session.commit()
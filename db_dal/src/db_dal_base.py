@@ -0,0 +1,457 @@
+import base64
+import itertools
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+import pydantic
+import sqlalchemy
+import sqlmodel
+from pydantic_core import to_jsonable_python
+from sqlalchemy import Engine, Insert, ColumnElement, Select, Delete
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.types import TypeEngine
+
+from db_dal.src.dal_cache import DalCache
+from db_dal.src.dal_filter import DalFilter, filter_clause, filter_field_names
+from db_dal.src.dal_metrics import DalMetrics, DalOperation, NULL_OPERATION
+from db_dal.src.dal_transaction import current_dal_transaction
+from pydantic_db_model.src.json_sql import json_sql
+from pydantic_db_model.src.fix_missing_timezone.fix_missing_timezone import set_missing_timezone_in_values
+from pydantic_db_model.src.pydantic_db_model import db_rows_to_pydantic, db_select_columns, pydantic_to_db_dict
+from pydantic_db_model.src.pydantic_to_flat.src import convert
+from pydantic_db_model.src.pydantic_to_flat.src.create_flat_model import PydanticFieldDefinition
+
+
+type FilterArgs = dict[str, Any] | DalFilter
+# The records filter of get_by_dict, delete_by_dict etc.: {field: value} equality conditions, or a DalFilter expression
+
+DEFAULT_BATCH_SIZE = 1000
+# Max number of records sent to the DB in a single bulk statement
+
+_AGGREGATE_FUNCTIONS = ("min", "max", "sum")
+
+_NULLS_LAST_DIALECTS = ("postgresql", "oracle")
+# Dialects sorting NULLs as larger than any value (last in ascending order). Others (SQLite, MySQL) sort them first
+
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert, "mysql": mysql.insert}
+# Dialects with native upsert (INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE) support
+
+
+class DalKeyNotFoundError(Exception):
+    def __init__(self, message: str, missing_keys: Optional[list[dict[str, Any]]] = None):
+        super().__init__(message)
+        self.missing_keys = missing_keys or []
+
+
+@dataclass
+class DalPage[T: pydantic.BaseModel]:
+    records: list[T]
+    next_page_token: Optional[str]
+    # Opaque continuation token for DbDal.get_page(). None on the last page
+
+
+class DbDalBase[T: pydantic.BaseModel]:
+    """
+    The DB I/O independent part of DbDal & AsyncDbDal: key fields handling, statements building & results shaping.
+    """
+    def __init__(
+            self,
+            db_engine: Engine | AsyncEngine,
+            model: type[T],
+            cache: Optional[DalCache] = None,
+            trusted_reads: bool = False,
+            metrics: Optional[DalMetrics] = None,
+    ):
+        self.db_engine = db_engine
+        self.model = model
+        self.cache = cache
+        self.trusted_reads = trusted_reads
+        # Default of the read methods trusted argument: build the read records by model_construct, without validation
+        self.metrics = metrics
+        # Measures the DAL operations when set (see DalMetrics)
+        self._used_filters: set[tuple[str, ...]] = set()
+        # The args_dict fields combinations queried so far (see unindexed_filters)
+        assert hasattr(model, "__db_model__"), f"Use generate_db_model({model.__name__}) after class definition to create and link it to a db_model"
+        self._select_columns = db_select_columns(model.__db_model__)
+        # Records are selected as raw rows of these columns, and converted by _to_records (no db_model instances)
+        self.key_fields = self.get_key_fields()
+        if len(self.key_fields) == 1:
+            self.key_field_name = list(self.key_fields.keys())[0]
+
+    def get_key_fields(self) -> dict[str, PydanticFieldDefinition]:
+        return {
+            field: (info.annotation, info)
+            for field, info in self.model.model_fields.items()
+            if getattr(info, "primary_key", False) is True
+        }
+
+    def unindexed_filters(self, filters: Optional[Iterable[Iterable[str]]] = None) -> list[tuple[str, ...]]:
+        """
+        Returns the filter fields combinations (args_dict keys of get_by_dict etc.) that no index supports,
+        i.e. none of their fields is the leading column of the primary key, a unique constraint or an index,
+        so they scan the whole table.
+        filters defaults to the combinations queried by this DAL so far.
+        """
+        leading_fields = self._leading_indexed_fields()
+        filters = self._used_filters if filters is None else {tuple(sorted(fields)) for fields in filters}
+        return sorted(fields for fields in filters if fields and leading_fields.isdisjoint(fields))
+
+    def _leading_indexed_fields(self) -> set[str]:
+        table = self.model.__db_model__.__table__
+        leading_expressions = [index.expressions[0] for index in table.indexes] + [
+            next(iter(constraint.columns)) for constraint in table.constraints
+            if isinstance(constraint, (sqlalchemy.PrimaryKeyConstraint, sqlalchemy.UniqueConstraint)) and constraint.columns
+        ]
+        return {expression.name for expression in leading_expressions if isinstance(expression, sqlalchemy.Column)}
+
+    def json_contains(self, field_name: str, value: Any) -> ColumnElement[bool]:
+        """
+        Returns a where clause (for get_by_dict) matching records whose composite field_name contains value,
+        e.g. dal.json_contains("hobbies", "hiking"). See json_sql.json_contains.
+        """
+        return json_sql.json_contains(getattr(self.model.__db_model__, field_name), value)
+
+    def json_path(self, field_name: str, *path: str | int, type_: Optional[TypeEngine] = None) -> ColumnElement:
+        """
+        Returns the value at path of composite field_name, to be compared in a where clause (for get_by_dict),
+        e.g. dal.json_path("address", "city") == "Paris". See json_sql.json_path.
+        """
+        return json_sql.json_path(getattr(self.model.__db_model__, field_name), *path, type_=type_)
+
+    def _operation(self, name: str) -> DalOperation:
+        """
+        Returns the timer of a DAL operation (method call), which measures nothing when the DAL has no metrics.
+        """
+        return self.metrics.operation(self.model.__name__, name) if self.metrics is not None else NULL_OPERATION
+
+    def _select_statement(self, args_dict: FilterArgs, where: Sequence[ColumnElement[bool]] = ()) -> Select:
+        return sqlalchemy.select(*self._select_columns).where(*self._where_clauses(args_dict), *where)
+
+    def _where_clauses(self, args_dict: FilterArgs) -> list[ColumnElement[bool]]:
+        """
+        Returns the WHERE clause of an args_dict (fields equality) or a DalFilter (see dal_filter), as a list (empty for {}).
+        """
+        self._used_filters.add(filter_field_names(args_dict))
+        clause = filter_clause(args_dict, self.model)
+        return [clause] if clause is not None else []
+
+    def _count_statement(self, args_dict: FilterArgs) -> Select:
+        return sqlalchemy.select(sqlalchemy.func.count()).select_from(self.model.__db_model__).where(*self._where_clauses(args_dict))
+
+    def _exists_statement(self, args_dict: FilterArgs) -> Select:
+        # Stops at the first matching row
+        return sqlalchemy.select(sqlalchemy.literal(1)).select_from(self.model.__db_model__).where(*self._where_clauses(args_dict)).limit(1)
+
+    def _aggregate_statement(self, function: str, field_name: str, args_dict: FilterArgs) -> Select:
+        assert function in _AGGREGATE_FUNCTIONS, f"{function=} must be one of {_AGGREGATE_FUNCTIONS}"
+        aggregate = getattr(sqlalchemy.func, function)(self._flat_column(field_name))
+        return sqlalchemy.select(aggregate).where(*self._where_clauses(args_dict))
+
+    def _count_by_statement(self, field_name: str, args_dict: FilterArgs) -> Select:
+        column = self._flat_column(field_name)
+        return sqlalchemy.select(column, sqlalchemy.func.count()).where(*self._where_clauses(args_dict)).group_by(column).order_by(column)
+
+    def _flat_column(self, field_name: str) -> sqlalchemy.Column:
+        assert field_name in self.model.model_fields, f"{field_name=} is not a field of {self.model.__name__}"
+        converter = convert.get_converter(self.model, self.model.__db_model__)
+        assert field_name in converter.flat_field_names, f"{field_name} is a composite (JSON) field: aggregates apply to flat fields only"
+        return getattr(self.model.__db_model__, field_name)
+
+    def _to_field_value(self, field_name: str, value: Any) -> Any:
+        """
+        Returns a flat field's value read by an aggregate, with its missing timezone set (like the records' values).
+        """
+        if (fixed_timezone := self.model.__db_model__.__fixed_timezone__) and isinstance(value, datetime) and value.tzinfo is None:
+            return value.replace(tzinfo=fixed_timezone)
+        return value
+
+    def _ordered_select_statement(
+            self,
+            args_dict: FilterArgs,
+            order_by: Optional[str],
+            descending: bool,
+            limit: Optional[int],
+            offset: Optional[int],
+            where: Sequence[ColumnElement[bool]] = (),
+    ) -> Select:
+        statement = self._select_statement(args_dict, where).limit(limit).offset(offset)
+        if order_by is not None:
+            statement = statement.order_by(*self._order_by_clauses([order_by], descending))
+        return statement
+
+    def _fields_select_statement(
+            self,
+            args_dict: FilterArgs,
+            fields: Sequence[str],
+            order_by: Optional[str],
+            descending: bool,
+            limit: Optional[int],
+            offset: Optional[int],
+            where: Sequence[ColumnElement[bool]],
+    ) -> Select:
+        for field_name in fields:
+            assert field_name in self.model.model_fields, f"{field_name=} is not a field of {self.model.__name__}"
+        columns = [getattr(self.model.__db_model__, field_name) for field_name in fields]
+        return self._ordered_select_statement(args_dict, order_by, descending, limit, offset, where).with_only_columns(*columns)
+
+    def _to_fields_records(self, rows: Iterable[Sequence[Any]], fields: Sequence[str], as_model: bool) -> list[dict[str, Any]] | list[T]:
+        """
+        Returns {field: value} dicts (or partial models) of the selected fields rows, decoding only their JSON fields.
+        """
+        json_adapters = convert.get_converter(self.model, self.model.__db_model__).json_adapters
+        field_adapters = [(field_name, json_adapters.get(field_name)) for field_name in fields]
+        fixed_timezone = self.model.__db_model__.__fixed_timezone__
+        records = []
+        for row in rows:
+            values = {
+                field_name: value if adapter is None else adapter.validate_json(value)
+                for (field_name, adapter), value in zip(field_adapters, row)
+            }
+            if fixed_timezone:
+                set_missing_timezone_in_values(values, fixed_timezone)
+            records.append(self.model.model_construct(**values) if as_model else values)
+        return records
+
+    def _page_statement(
+            self,
+            args_dict: FilterArgs,
+            page_size: int,
+            order_by: Optional[str],
+            descending: bool,
+            page_token: Optional[str],
+    ) -> tuple[Select, list[str]]:
+        """
+        Returns the keyset pagination statement (fetching one extra record to find out if there's a next page),
+        and the fields it's ordered by.
+        """
+        order_fields = list(self.key_fields)
+        if order_by is not None:
+            assert self._is_indexed(order_by), f"{order_by=} must be a key field or an indexed field of {self.model.__db_model__.__tablename__}"
+            # Ordered by order_by first, then by the (other) key fields as tie breakers
+            order_fields = [order_by, *(field_name for field_name in self.key_fields if field_name != order_by)]
+        statement = self._select_statement(args_dict).order_by(*self._order_by_clauses(order_fields, descending))
+        if page_token is not None:
+            after_values = self._decode_page_token(page_token, order_fields, descending)
+            statement = statement.where(self._seek_clause(order_fields, after_values, descending))
+        return statement.limit(page_size + 1), order_fields
+
+    def _seek_clause(self, order_fields: list[str], after_values: tuple, descending: bool) -> ColumnElement[bool]:
+        """
+        Returns the condition of the records after after_values (of order_fields) in the pagination order.
+        Only the leading order_by field may be nullable (key fields aren't): its NULLs are compared explicitly,
+        where the dialect sorts them (see _NULLS_LAST_DIALECTS), since NULL is never smaller or greater than a value.
+        """
+        order_columns = [getattr(self.model.__db_model__, field_name) for field_name in order_fields]
+        if not order_columns[0].nullable:
+            seek_key = sqlalchemy.tuple_(*order_columns)
+            return seek_key < after_values if descending else seek_key > after_values
+        column, after_value = order_columns[0], after_values[0]
+        seek_key = sqlalchemy.tuple_(*order_columns[1:])
+        after_key = seek_key < after_values[1:] if descending else seek_key > after_values[1:]
+        nulls_first = (self.db_engine.dialect.name in _NULLS_LAST_DIALECTS) == descending
+        if after_value is None:
+            after_nulls = sqlalchemy.and_(column.is_(None), after_key)
+            return sqlalchemy.or_(after_nulls, column.is_not(None)) if nulls_first else after_nulls
+        after_column = column < after_value if descending else column > after_value
+        after_clauses = [after_column, sqlalchemy.and_(column == after_value, after_key)]
+        return sqlalchemy.or_(*after_clauses) if nulls_first else sqlalchemy.or_(*after_clauses, column.is_(None))
+
+    def _to_page(
+            self,
+            rows: Sequence[sqlalchemy.Row],
+            page_size: int,
+            order_fields: list[str],
+            descending: bool,
+            trusted: Optional[bool],
+    ) -> DalPage[T]:
+        next_page_token = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last_values = [getattr(rows[-1], field_name) for field_name in order_fields]
+            next_page_token = self._encode_page_token(last_values, order_fields, descending)
+        return DalPage(self._to_records(rows, trusted), next_page_token)
+
+    def _to_records(self, rows: Sequence[Sequence[Any]], trusted: Optional[bool]) -> list[T]:
+        """
+        Returns the records of raw rows selected by _select_statement (see db_rows_to_pydantic).
+        trusted=None uses the DAL's trusted_reads.
+        """
+        return db_rows_to_pydantic(self.model.__db_model__, rows, self.trusted_reads if trusted is None else trusted)
+
+    def _order_by_clauses(self, field_names: list[str], descending: bool) -> list[ColumnElement]:
+        columns = [getattr(self.model.__db_model__, field_name) for field_name in field_names]
+        return [column.desc() if descending else column.asc() for column in columns]
+
+    def _is_indexed(self, field_name: str) -> bool:
+        return self.model.__db_model__.__table__.columns[field_name].primary_key or field_name in self._leading_indexed_fields()
+
+    @staticmethod
+    def _encode_page_token(values: list[Any], order_fields: list[str], descending: bool) -> str:
+        page_position = {"order_by": order_fields, "descending": descending, "after": to_jsonable_python(values)}
+        return base64.urlsafe_b64encode(json.dumps(page_position).encode()).decode()
+
+    def _decode_page_token(self, page_token: str, order_fields: list[str], descending: bool) -> tuple:
+        page_position = json.loads(base64.urlsafe_b64decode(page_token))
+        assert page_position["order_by"] == order_fields and page_position["descending"] == descending, (
+            f"{page_token=} was created for a different order (order_by={page_position['order_by']}, descending={page_position['descending']})"
+        )
+        db_fields = self.model.__db_model__.model_fields
+        return tuple(
+            pydantic.TypeAdapter(db_fields[field_name].annotation).validate_python(value)
+            for field_name, value in zip(order_fields, page_position["after"])
+        )
+
+    def _keys_tuples(self, keys_list: list[...]) -> list[tuple]:
+        return [tuple(self._to_keys_dict(key).values()) for key in keys_list]
+
+    def _select_by_keys_statements(self, keys_tuples: list[tuple], batch_size: int) -> Iterator[Select]:
+        for batch in itertools.batched(dict.fromkeys(keys_tuples), batch_size):
+            yield sqlalchemy.select(*self._select_columns).where(self._keys_clause(batch))
+
+    def _in_keys_order(self, records: Iterable[T], keys_tuples: list[tuple], raise_on_missing: bool) -> list[Optional[T]]:
+        records_by_key = {self._record_key(record): record for record in records}
+        if raise_on_missing and (missing_keys := [key for key in keys_tuples if key not in records_by_key]):
+            raise DalKeyNotFoundError(
+                f"Keys {missing_keys} not found in {self.model.__db_model__.__tablename__} DB table",
+                [dict(zip(self.key_fields, key)) for key in missing_keys],
+            )
+        return [records_by_key.get(key) for key in keys_tuples]
+
+    def _record_key(self, record: T) -> tuple:
+        return tuple(getattr(record, key_field_name) for key_field_name in self.key_fields)
+
+    def _cached_records(self, keys_tuples: list[tuple]) -> dict[tuple, T]:
+        return self.cache.get_many(dict.fromkeys(keys_tuples)) if self.cache is not None else {}
+
+    def _cache_generation(self) -> int:
+        return self.cache.generation if self.cache is not None else 0
+
+    def _cache_records(self, records: list[T], cache_generation: int) -> None:
+        # Records read inside a dal_transaction may be uncommitted (and rolled back later), so they're not cached
+        if self.cache is not None and current_dal_transaction(self.db_engine) is None:
+            self.cache.put_many({self._record_key(record): record for record in records}, cache_generation)
+
+    def _invalidate_cached_records(self, records: list[T]) -> None:
+        if self.cache is not None:
+            self._invalidate_cache(lambda keys=[self._record_key(record) for record in records]: self.cache.invalidate(keys))
+
+    def _invalidate_cached_keys(self, keys_tuples: list[tuple]) -> None:
+        if self.cache is not None:
+            self._invalidate_cache(lambda: self.cache.invalidate(keys_tuples))
+
+    def _clear_cache(self) -> None:
+        if self.cache is not None:
+            self._invalidate_cache(self.cache.clear)
+
+    def _invalidate_cache(self, invalidate: Callable[[], None]) -> None:
+        invalidate()
+        if (transaction := current_dal_transaction(self.db_engine)) is not None:
+            # Again after the commit, since other readers may cache the old records until then
+            transaction.after_commit.append(invalidate)
+
+    def _in_transaction(self) -> bool:
+        """
+        Returns True inside a dal_transaction block (on this DAL's engine), whose session the DAL calls share,
+        and which commits once at its end (so the DAL calls only flush).
+        """
+        return current_dal_transaction(self.db_engine) is not None
+
+    def _to_keys_dict(self, key: ...) -> dict[str, Any]:
+        """
+        Returns a {key field: value} dict, ordered by key fields, from:
+        a keys dict, a pydantic object (with all key fields) or a single key value.
+        """
+        if isinstance(key, dict):
+            keys_dict = key
+        elif isinstance(key, pydantic.BaseModel):
+            keys_dict = {key_field_name: getattr(key, key_field_name) for key_field_name in self.key_fields}
+        else:
+            assert hasattr(self, "key_field_name"), f"{self.model} has no single key field defined"
+            keys_dict = {self.key_field_name: key}
+        assert len(keys_dict) == len(self.key_fields), f"{keys_dict=} must contain exactly the key fields {list(self.key_fields)}"
+        for key_field_name, (annotation, _) in self.key_fields.items():
+            assert isinstance(keys_dict[key_field_name], annotation), f"{keys_dict=} - {key_field_name} must be of type {annotation}"
+        return {key_field_name: keys_dict[key_field_name] for key_field_name in self.key_fields}
+
+    def _keys_clause(self, keys_tuples: Iterable[tuple]) -> ColumnElement[bool]:
+        key_columns = [getattr(self.model.__db_model__, key_field_name) for key_field_name in self.key_fields]
+        if len(key_columns) == 1:
+            return key_columns[0].in_([key[0] for key in keys_tuples])
+        return sqlalchemy.tuple_(*key_columns).in_(list(keys_tuples))
+
+    def _insert_statements(self, records: list[T], batch_size: int) -> Iterator[tuple[Insert, list[dict[str, Any]]]]:
+        """
+        Yields executemany INSERT statements with their rows, for each chunk of up to batch_size records.
+        """
+        for batch in itertools.batched(records, batch_size):
+            yield sqlmodel.insert(self.model.__db_model__), [self._without_missing_keys(self._to_db_row(record)) for record in batch]
+
+    def _supports_native_upsert(self) -> bool:
+        return self.db_engine.dialect.name in _DIALECT_INSERTS
+
+    def _upsert_statements(self, records: list[T], batch_size: int) -> Iterator[tuple[Insert, list[dict[str, Any]]]]:
+        """
+        Yields executemany upsert statements with their rows, for each chunk of up to batch_size records.
+        Records without a key are inserted by a plain INSERT, to let the DB generate their key.
+        """
+        for batch in itertools.batched(records, batch_size):
+            yield from self._db_rows_statements([self._to_db_row(record) for record in batch], upsert=True)
+
+    def _db_rows_statements(self, rows: list[dict[str, Any]], upsert: bool) -> Iterator[tuple[Insert, list[dict[str, Any]]]]:
+        """
+        Yields the executemany statements (with their rows) writing a batch of DB rows: INSERT, or upsert.
+        """
+        if not upsert:
+            yield sqlmodel.insert(self.model.__db_model__), [self._without_missing_keys(row) for row in rows]
+            return
+        if keyed_rows := self._unique_keyed_rows(rows):
+            yield self._upsert_statement(), keyed_rows
+        if new_rows := [self._without_missing_keys(row) for row in rows if self._has_missing_key(row)]:
+            yield sqlmodel.insert(self.model.__db_model__), new_rows
+
+    def _upsert_statement(self) -> Insert:
+        dialect_name = self.db_engine.dialect.name
+        table = self.model.__db_model__.__table__
+        statement = _DIALECT_INSERTS[dialect_name](table)
+        update_columns = [column.name for column in table.columns if column.name not in self.key_fields]
+        if dialect_name == "mysql":
+            update_columns = update_columns or list(self.key_fields)
+            return statement.on_duplicate_key_update({name: statement.inserted[name] for name in update_columns})
+        if not update_columns:
+            return statement.on_conflict_do_nothing(index_elements=list(self.key_fields))
+        return statement.on_conflict_do_update(
+            index_elements=list(self.key_fields),
+            set_={name: statement.excluded[name] for name in update_columns},
+        )
+
+    def _unique_keyed_rows(self, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # A single upsert statement can't affect the same row twice (PostgreSQL), so only the last record of each key is kept
+        assert self.key_fields, f"{self.model} has no key fields defined"
+        keyed_rows = {
+            tuple(row[key_field_name] for key_field_name in self.key_fields): row
+            for row in rows if not self._has_missing_key(row)
+        }
+        return list(keyed_rows.values())
+
+    def _to_db_row(self, record: T) -> dict[str, Any]:
+        assert isinstance(record, self.model)
+        return pydantic_to_db_dict(record)
+
+    def _has_missing_key(self, row: dict[str, Any]) -> bool:
+        return any(row[key_field_name] is None for key_field_name in self.key_fields)
+
+    def _without_missing_keys(self, row: dict[str, Any]) -> dict[str, Any]:
+        for key_field_name in self.key_fields:
+            if row[key_field_name] is None:
+                del row[key_field_name]  # Lets the DB generate the key (autoincrement)
+        return row
+
+    def _delete_statement(self, args_dict: FilterArgs) -> Delete:
+        return sqlmodel.delete(self.model.__db_model__).where(*self._where_clauses(args_dict))
+
+    def _delete_by_keys_statements(self, keys_tuples: list[tuple], batch_size: int) -> Iterator[Delete]:
+        for batch in itertools.batched(dict.fromkeys(keys_tuples), batch_size):
+            yield sqlmodel.delete(self.model.__db_model__).where(self._keys_clause(batch))
@@ -1,16 +1,142 @@
 import logging
+from dataclasses import dataclass, asdict
+from typing import Any, Optional
 
 import sqlmodel
-from sqlalchemy import Engine
+from sqlalchemy import Engine, event, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 
-def connect_to_db_and_create_tables(db_connection_url: str) -> Engine:
-    engine = sqlmodel.create_engine(url=db_connection_url, echo=False)
-    logging.debug(f"Connected to DB {db_connection_url}")
-    _create_db_and_tables(engine)
+SQLITE_BEGIN_IMMEDIATE = "sqlite_begin_immediate"
+# Execution option taking the SQLite write lock when the transaction begins, rather than on its first write
+
+
+@dataclass(frozen=True)
+class SqlitePragmas:
+    """
+    PRAGMAs applied to every new SQLite connection. A None value leaves the SQLite default.
+    """
+    journal_mode: Optional[str] = "WAL"
+    # WAL lets readers run concurrently with a writer (ignored by in-memory DBs)
+    synchronous: Optional[str] = "NORMAL"
+    # NORMAL is durable enough in WAL mode and avoids an fsync on every commit
+    cache_size: Optional[int] = -64000
+    # Page cache size per connection. Negative values are in KiB (64 MiB)
+    mmap_size: Optional[int] = 256 * 1024 * 1024
+    # Bytes of the DB file read through memory mapping
+
+
+@dataclass(frozen=True)
+class DbEngineSettings:
+    """
+    Engine tuning options. The pool options are not applied to in-memory SQLite DBs,
+    which use a single connection per thread.
+    """
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_recycle: int = 1800
+    # Seconds after which a pooled connection is replaced (before DB / proxy idle timeouts drop it)
+    pool_pre_ping: bool = True
+    # Test each connection on checkout, so dropped connections are replaced instead of failing a query
+    query_cache_size: int = 500
+    # Number of compiled SQL statements cached by the engine
+    sqlite_pragmas: Optional[SqlitePragmas] = SqlitePragmas()
+    echo: bool = False
+
+
+def connect_to_db_and_create_tables(
+        db_connection_url: str,
+        settings: DbEngineSettings = DbEngineSettings(),
+        create_tables: bool = True,
+) -> Engine:
+    """
+    Returns a tuned Engine (see DbEngineSettings).
+    Set create_tables=False to skip tables creation (e.g. in worker processes), and call create_db_tables() once instead.
+    """
+    engine = sqlmodel.create_engine(url=db_connection_url, **_engine_options(db_connection_url, settings, QueuePool))
+    _set_sqlite_pragmas_on_connect(engine, settings.sqlite_pragmas)
+    _set_sqlite_transactions_begin(engine)
+    logging.debug("Connected to DB %s", db_connection_url)
+    if create_tables:
+        create_db_tables(engine)
     return engine
 
 
-def _create_db_and_tables(db_engine: Engine):
+async def connect_to_async_db_and_create_tables(
+        db_connection_url: str,
+        settings: DbEngineSettings = DbEngineSettings(),
+        create_tables: bool = True,
+) -> AsyncEngine:
+    """
+    Returns an AsyncEngine (for AsyncDbDal). db_connection_url must use an async driver, e.g. "sqlite+aiosqlite://".
+    """
+    engine = create_async_engine(url=db_connection_url, **_engine_options(db_connection_url, settings, AsyncAdaptedQueuePool))
+    _set_sqlite_pragmas_on_connect(engine.sync_engine, settings.sqlite_pragmas)
+    _set_sqlite_transactions_begin(engine.sync_engine)
+    logging.debug("Connected to DB %s", db_connection_url)
+    if create_tables:
+        async with engine.begin() as connection:
+            await connection.run_sync(sqlmodel.SQLModel.metadata.create_all)
+        logging.debug("DB & Tables created! \n")
+    return engine
+
+
+def create_db_tables(db_engine: Engine) -> None:
+    """
+    Creates the tables of all the generated db models which don't exist yet.
+    """
     sqlmodel.SQLModel.metadata.create_all(db_engine)
     logging.debug("DB & Tables created! \n")
+
+
+def _engine_options(db_connection_url: str, settings: DbEngineSettings, pool_class: type[Pool]) -> dict[str, Any]:
+    options: dict[str, Any] = {"echo": settings.echo, "query_cache_size": settings.query_cache_size}
+    if not _is_sqlite_memory_db(db_connection_url):
+        # The pool class is explicit, since some drivers default to a NullPool (e.g. aiosqlite file DBs on earlier SQLAlchemy 2.0 releases)
+        options |= {
+            "poolclass": pool_class,
+            "pool_size": settings.pool_size,
+            "max_overflow": settings.max_overflow,
+            "pool_recycle": settings.pool_recycle,
+            "pool_pre_ping": settings.pool_pre_ping,
+        }
+    return options
+
+
+def _is_sqlite_memory_db(db_connection_url: str) -> bool:
+    url = make_url(db_connection_url)
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def _set_sqlite_pragmas_on_connect(engine: Engine, sqlite_pragmas: Optional[SqlitePragmas]) -> None:
+    if engine.dialect.name != "sqlite" or sqlite_pragmas is None:
+        return
+    pragmas = {name: value for name, value in asdict(sqlite_pragmas).items() if value is not None}
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _set_sqlite_transactions_begin(engine: Engine) -> None:
+    """
+    The sqlite3 driver begins transactions by itself (only before writes), which breaks SAVEPOINTs
+    (nested dal_transaction blocks). The driver's transaction handling is disabled, and SQLAlchemy emits BEGIN
+    (BEGIN IMMEDIATE for connections with the SQLITE_BEGIN_IMMEDIATE execution option, see dal_transaction).
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def disable_driver_transactions(dbapi_connection, _connection_record) -> None:
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def emit_begin(connection) -> None:
+        connection.exec_driver_sql("BEGIN IMMEDIATE" if connection.get_execution_options().get(SQLITE_BEGIN_IMMEDIATE) else "BEGIN")
@@ -0,0 +1,178 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+import pydantic
+import pytest
+import sqlmodel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from db_dal.src.async_db_dal import AsyncDbDal
+from db_dal.src.dal_metrics import DalMetrics
+from db_dal.src.dal_transaction import async_dal_transaction
+from db_dal.src.db_dal import DalKeyNotFoundError
+from db_dal.src.db_engine import connect_to_async_db_and_create_tables
+from pydantic_db_model.src.pydantic_db_model import generate_db_model
+
+FIRST_AUTO_INT_INDEX = 1
+
+
+class AsyncModel(pydantic.BaseModel):
+    index: Optional[int] = sqlmodel.Field(default=None, primary_key=True)
+    tags: list[str] = ["a", "b"]
+    desc: Optional[str] = sqlmodel.Field(default=None, index=True)
+
+
+generate_db_model(AsyncModel)
+
+
+def with_async_dal(test: Callable[[AsyncDbDal], Awaitable[None]]) -> Callable[[], None]:
+    """
+    Runs an async test in a new event loop, with an AsyncDbDal of a new in-memory DB.
+    """
+    def run_test() -> None:
+        async def run() -> None:
+            db_engine = await connect_to_async_db_and_create_tables("sqlite+aiosqlite:///:memory:")
+            try:
+                await test(AsyncDbDal(db_engine, AsyncModel))
+            finally:
+                await db_engine.dispose()
+
+        asyncio.run(run())
+
+    return run_test
+
+
+@with_async_dal
+async def test_get_all_empty(dal: AsyncDbDal) -> None:
+    assert await dal.get_all() == []
+
+
+@with_async_dal
+async def test_add_get_by_key(dal: AsyncDbDal) -> None:
+    am = AsyncModel()
+    await dal.add(am)
+    am.index = FIRST_AUTO_INT_INDEX
+    assert await dal.get_by_key(FIRST_AUTO_INT_INDEX) == am
+    with pytest.raises(DalKeyNotFoundError):
+        await dal.get_by_key(FIRST_AUTO_INT_INDEX + 1)
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_add_list_get_by_dict(bulk: bool) -> None:
+    @with_async_dal
+    async def test(dal: AsyncDbDal) -> None:
+        am_list = [AsyncModel(index=i, desc=str(i % 2)) for i in range(1, 6)]
+        await dal.add_list(am_list, bulk=bulk, batch_size=2)
+        assert await dal.get_all() == am_list
+        assert await dal.get_by_dict({"desc": "1"}) == am_list[0::2]
+        assert await dal.get_by_dict({}, order_by="index", descending=True, limit=2) == [am_list[4], am_list[3]]
+
+    test()
+
+
+@with_async_dal
+async def test_add_duplicate_key(dal: AsyncDbDal) -> None:
+    with pytest.raises(IntegrityError):
+        await dal.add_list([AsyncModel(index=1), AsyncModel(index=1)])
+    assert await dal.get_all() == []
+
+
+@with_async_dal
+async def test_get_by_keys_list(dal: AsyncDbDal) -> None:
+    am_list = [AsyncModel(index=i) for i in range(1, 6)]
+    await dal.add_list(am_list)
+    assert await dal.get_by_keys_list([5, 1, 3], batch_size=2) == [am_list[4], am_list[0], am_list[2]]
+    assert await dal.get_by_keys_list([7, 2], raise_on_missing=False) == [None, am_list[1]]
+    with pytest.raises(DalKeyNotFoundError):
+        await dal.get_by_keys_list([7, 2])
+
+
+@with_async_dal
+async def test_get_page_and_iter(dal: AsyncDbDal) -> None:
+    am_list = [AsyncModel(index=i) for i in range(1, 8)]
+    await dal.add_list(am_list)
+    first_page = await dal.get_page({}, 4)
+    second_page = await dal.get_page({}, 4, page_token=first_page.next_page_token)
+    assert first_page.records + second_page.records == am_list
+    assert second_page.next_page_token is None
+    assert [am async for am in dal.iter_all(chunk_size=3)] == am_list
+
+
+@with_async_dal
+async def test_get_fields_by_dict(dal: AsyncDbDal) -> None:
+    await dal.add_list([AsyncModel(index=1, desc="1"), AsyncModel(index=2, tags=[])])
+    assert await dal.get_fields_by_dict({}, ["index", "tags"]) == [{"index": 1, "tags": ["a", "b"]}, {"index": 2, "tags": []}]
+
+
+@with_async_dal
+async def test_upsert_list(dal: AsyncDbDal) -> None:
+    await dal.add_list([AsyncModel(index=1, desc="11"), AsyncModel(index=2, desc="22")])
+    am_list = [AsyncModel(index=2, desc="33"), AsyncModel(index=4, desc="44")]
+    await dal.upsert_list(am_list)
+    await dal.upsert(AsyncModel(index=1, desc="55"))
+    assert await dal.get_all() == [AsyncModel(index=1, desc="55")] + am_list
+
+
+@with_async_dal
+async def test_deletes(dal: AsyncDbDal) -> None:
+    am_list = [AsyncModel(index=i, desc=str(i % 2)) for i in range(1, 8)]
+    await dal.add_list(am_list)
+    assert await dal.delete_record(am_list[0]) == 1
+    assert await dal.delete_by_key(2) == 1
+    assert await dal.delete_by_keys_list([3, 4, 9]) == 2
+    assert await dal.delete_by_dict({"desc": "1"}) == 2
+    assert await dal.get_all() == [am_list[5]]
+    assert await dal.delete_all() == 1
+
+
+@with_async_dal
+async def test_metrics(dal: AsyncDbDal) -> None:
+    metrics = DalMetrics()
+    dal = AsyncDbDal(dal.db_engine, AsyncModel, metrics=metrics)
+    await dal.add_list([AsyncModel(index=1), AsyncModel(index=2)], bulk=True)
+    assert [am.index async for am in dal.iter_all(chunk_size=1)] == [1, 2]
+    assert await dal.get_by_keys_list([1]) == [AsyncModel(index=1)]
+    stats = metrics.stats()
+    assert [(name, operation_stats.rows_in, operation_stats.rows_out) for (_, name), operation_stats in stats.items()] == [
+        ("add_list", 2, 0), ("iter_by_dict", 0, 2), ("get_by_keys_list", 0, 1),
+    ]
+    assert all(operation_stats.sql_seconds > 0 for operation_stats in stats.values())
+
+
+@with_async_dal
+async def test_transaction(dal: AsyncDbDal) -> None:
+    async with async_dal_transaction(dal.db_engine):
+        await dal.add(AsyncModel(index=1))
+        with pytest.raises(IntegrityError):
+            async with async_dal_transaction(dal.db_engine):
+                await dal.add(AsyncModel(index=2))
+                await dal.add(AsyncModel(index=1))
+        await dal.upsert_list([AsyncModel(index=3)])
+    with pytest.raises(DalKeyNotFoundError):
+        async with async_dal_transaction(dal.db_engine):
+            await dal.delete_all()
+            await dal.get_by_key(1)
+    assert [am.index for am in await dal.get_all()] == [1, 3]
+
+
+@with_async_dal
+async def test_count_exists_aggregates(dal: AsyncDbDal) -> None:
+    await dal.add_list([AsyncModel(index=i, desc=str(i % 2)) for i in range(1, 5)])
+    assert (await dal.count(), await dal.count({"desc": "1"}), await dal.exists({"desc": "2"})) == (4, 2, False)
+    assert (await dal.min("index"), await dal.max("index"), await dal.sum("index")) == (1, 4, 10)
+    assert await dal.count_by("desc") == {"0": 2, "1": 2}
+
+
+def test_file_db(tmp_path) -> None:
+    async def run() -> None:
+        db_engine = await connect_to_async_db_and_create_tables(f"sqlite+aiosqlite:///{tmp_path}/async.db")
+        try:
+            assert isinstance(db_engine.pool, AsyncAdaptedQueuePool)
+            dal = AsyncDbDal(db_engine, AsyncModel)
+            await asyncio.gather(*(dal.add(AsyncModel(index=i)) for i in range(1, 4)))
+            assert [am.index for am in await dal.get_all()] == [1, 2, 3]
+        finally:
+            await db_engine.dispose()
+
+    asyncio.run(run())
@@ -0,0 +1,43 @@
+import time
+
+import pydantic
+
+from db_dal.src.dal_cache import DalCache
+
+
+class CachedModel(pydantic.BaseModel):
+    index: int
+    desc: str = ""
+
+
+def test_get_many_put_many() -> None:
+    cache = DalCache()
+    cache.put_many({(1,): CachedModel(index=1)}, cache.generation)
+    assert cache.get_many([(1,), (2,)]) == {(1,): CachedModel(index=1)}
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_lru_eviction() -> None:
+    cache = DalCache(max_size=2)
+    cache.put_many({(1,): CachedModel(index=1), (2,): CachedModel(index=2)}, cache.generation)
+    cache.get_many([(1,)])
+    cache.put_many({(3,): CachedModel(index=3)}, cache.generation)
+    assert list(cache.get_many([(1,), (2,), (3,)])) == [(1,), (3,)]
+    assert cache.stats.evictions == 1
+
+
+def test_ttl() -> None:
+    cache = DalCache(ttl=0.01)
+    cache.put_many({(1,): CachedModel(index=1)}, cache.generation)
+    time.sleep(0.02)
+    assert cache.get_many([(1,)]) == {}
+    assert cache.stats.expirations == 1
+    assert len(cache) == 0
+
+
+def test_stale_put_skipped() -> None:
+    cache = DalCache()
+    generation = cache.generation
+    cache.invalidate([(1,)])
+    cache.put_many({(1,): CachedModel(index=1, desc="stale")}, generation)
+    assert cache.get_many([(1,)]) == {}
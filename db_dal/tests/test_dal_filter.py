@@ -0,0 +1,132 @@
+from datetime import datetime, timezone
+from enum import StrEnum
+from typing import Optional
+
+import pydantic
+import pytest
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+from db_dal.src.dal_filter import DalField, FieldCondition, all_of, any_of
+from db_dal.src.db_dal import DbDal
+from db_dal.src.db_engine import connect_to_db_and_create_tables
+from pydantic_db_model.src.pydantic_db_model import generate_db_model
+
+
+class Level(StrEnum):
+    low = "low"
+    high = "high"
+
+
+class FilterAddress(pydantic.BaseModel):
+    city: str
+    floor: int = 0
+
+
+class FilterModel(pydantic.BaseModel):
+    id: int = sqlmodel.Field(primary_key=True)
+    name: str
+    level: Level = Level.low
+    created: datetime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    note: Optional[str] = None
+    tags: list[str] = []
+    address: Optional[FilterAddress] = None
+
+
+generate_db_model(FilterModel, fixed_timezone="UTC")
+
+RECORDS = [
+    FilterModel(id=1, name="John", tags=["a"], address=FilterAddress(city="Paris", floor=2)),
+    FilterModel(id=2, name="Jane", level=Level.high, created=datetime(2024, 2, 1, tzinfo=timezone.utc), note="n", tags=["a", "b"]),
+    FilterModel(id=3, name="Bob_1", created=datetime(2024, 3, 1, tzinfo=timezone.utc), address=FilterAddress(city="Rome", floor=5)),
+    FilterModel(id=4, name="Bob%2", level=Level.high, note="n", address=FilterAddress(city="Paris")),
+]
+
+
+@pytest.fixture
+def dal() -> DbDal:
+    dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), FilterModel)
+    dal.add_list(RECORDS)
+    return dal
+
+
+@pytest.mark.parametrize("dal_filter, expected_ids", [
+    (DalField("id") > 2, [3, 4]),
+    (DalField("id") <= 2, [1, 2]),
+    (DalField("name") != "John", [2, 3, 4]),
+    (DalField("level") == "high", [2, 4]),
+    (DalField("id").in_([1, 4, 9]), [1, 4]),
+    (DalField("created").between(datetime(2024, 1, 15, tzinfo=timezone.utc), datetime(2024, 3, 1, tzinfo=timezone.utc)), [2, 3]),
+    (DalField("name").startswith("Bob_"), [3]),
+    (DalField("name").startswith("Bob%"), [4]),
+    (DalField("note").is_null(), [1, 3]),
+    (DalField("address").is_null(), [2]),
+    (DalField("address").is_null(False), [1, 3, 4]),
+    (DalField("tags").contains("b"), [2]),
+    (DalField("address", "city") == "Paris", [1, 4]),
+    (DalField("address", "floor") >= 2, [1, 3]),
+    (DalField("address", "city").in_(["Rome", "Oslo"]), [3]),
+    ((DalField("level") == Level.high) & (DalField("note") == "n") | (DalField("id") == 1), [1, 2, 4]),
+    (any_of(DalField("name") == "Jane", all_of(DalField("id") > 2, DalField("address", "floor") < 5)), [2, 4]),
+    (all_of(), [1, 2, 3, 4]),
+    (any_of(), []),
+])
+def test_get_by_filter(dal: DbDal, dal_filter, expected_ids: list[int]) -> None:
+    assert [record.id for record in dal.get_by_dict(dal_filter, order_by="id")] == expected_ids
+
+
+def test_single_where_clause(dal: DbDal) -> None:
+    statement = dal._select_statement((DalField("id") > 1) & ((DalField("name") == "Jane") | DalField("note").is_null()))
+    sql = str(statement.compile(compile_kwargs={"literal_binds": True}))
+    assert sql.count("WHERE") == 1
+    assert sql.endswith('WHERE "FilterModel".id > 1 AND ("FilterModel".name = \'Jane\' OR "FilterModel".note IS NULL)')
+
+
+def test_postgresql_json_text_columns(dal: DbDal) -> None:
+    def postgresql_sql(clause) -> str:
+        return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    assert postgresql_sql((DalField("address", "floor") >= 2).compile(FilterModel)) == (
+        """CAST((CAST("FilterModel".address AS JSONB) #>> '{floor}') AS INTEGER) >= 2"""
+    )
+    assert postgresql_sql(DalField("tags").contains("b").compile(FilterModel)) == """CAST("FilterModel".tags AS JSONB) @> CAST('"b"' AS JSONB)"""
+    assert postgresql_sql(dal.json_path("address", "city")) == """(CAST("FilterModel".address AS JSONB) #>> '{city}')"""
+
+
+def test_filter_other_methods(dal: DbDal) -> None:
+    dal_filter = DalField("level") == Level.high
+    assert [record.id for record in dal.iter_by_dict(dal_filter)] == [2, 4]
+    assert dal.get_fields_by_dict(dal_filter, ["name"]) == [{"name": "Jane"}, {"name": "Bob%2"}]
+    assert [record.id for record in dal.get_page(dal_filter, page_size=1).records] == [2]
+    assert dal.unindexed_filters() == [("level",)]
+    assert dal.delete_by_dict(dal_filter | (DalField("address", "city") == "Rome")) == 3
+    assert [record.id for record in dal.get_all()] == [1]
+
+
+@pytest.mark.parametrize("dal_filter", [
+    DalField("missing") == 1,
+    DalField("name").contains("J"),
+    DalField("address") == "Paris",
+    DalField("name", "first") == "J",
+    DalField("tags", 0).contains("a"),
+    DalField("id").startswith("1"),
+    FieldCondition("id", "between", (1,)),
+    FieldCondition("id", "like", "1%"),
+])
+def test_invalid_filter(dal: DbDal, dal_filter) -> None:
+    with pytest.raises(AssertionError):
+        dal.get_by_dict(dal_filter)
+
+
+def test_invalid_filter_value(dal: DbDal) -> None:
+    with pytest.raises(pydantic.ValidationError):
+        dal.get_by_dict(DalField("level") == "medium")
+    with pytest.raises(pydantic.ValidationError):
+        dal.delete_by_dict(DalField("id").in_([1, "two"]))
+
+
+def test_aggregates_with_filter(dal: DbDal) -> None:
+    assert dal.count(DalField("address", "city") == "Paris") == 2
+    assert dal.exists(DalField("tags").contains("b"))
+    assert dal.max("created", DalField("level") == Level.low) == datetime(2024, 3, 1, tzinfo=timezone.utc)
+    assert dal.count_by("level") == {Level.low: 2, Level.high: 2}
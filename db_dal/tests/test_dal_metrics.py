@@ -0,0 +1,41 @@
+import pytest
+
+from db_dal.src.dal_metrics import DalMetrics, DalOperationEvent, DalOperationStats
+
+
+def test_operation_stats_and_listeners() -> None:
+    metrics = DalMetrics()
+    events: list[DalOperationEvent] = []
+    metrics.add_listener(events.append)
+    with metrics.operation("Model", "get_by_dict") as operation:
+        with operation.phase("sql"):
+            pass
+        operation.add_rows(rows_out=3)
+    with pytest.raises(ValueError):
+        with metrics.operation("Model", "get_by_dict") as operation:
+            operation.add_cache_lookups(hits=1, misses=2)
+            raise ValueError()
+    assert [(event.rows_out, event.cache_hits, event.error) for event in events] == [(3, 0, False), (0, 1, True)]
+    assert events[0].sql_seconds <= events[0].total_seconds
+    stats = metrics.stats()[("Model", "get_by_dict")]
+    assert (stats.calls, stats.errors, stats.rows_out, stats.cache_hits, stats.cache_misses) == (2, 1, 3, 1, 2)
+    metrics.reset()
+    assert metrics.stats() == {}
+
+
+def test_timed_iterator() -> None:
+    metrics = DalMetrics()
+    with metrics.operation("Model", "iter_by_dict") as operation:
+        assert list(operation.timed(iter([1, 2]), "sql")) == [1, 2]
+    assert operation.event.sql_seconds > 0
+
+
+def test_prometheus_text() -> None:
+    metrics = DalMetrics()
+    metrics._report(DalOperationEvent("Model", "add_list", total_seconds=0.5, rows_in=10))
+    text = metrics.prometheus_text()
+    assert "# TYPE dal_operation_calls_total counter" in text
+    assert 'dal_operation_calls_total{model="Model",operation="add_list"} 1' in text
+    assert 'dal_operation_seconds_total{model="Model",operation="add_list",phase="total"} 0.5' in text
+    assert 'dal_rows_total{model="Model",operation="add_list",direction="in"} 10' in text
+    assert metrics.stats()[("Model", "add_list")] == DalOperationStats(calls=1, total_seconds=0.5, rows_in=10)
@@ -0,0 +1,33 @@
+import pytest
+
+from db_dal.src.dal_process_pool import DalProcessPool
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+def test_map_in_order() -> None:
+    with DalProcessPool(workers=2, max_pending=3) as process_pool:
+        assert list(process_pool.map(square, range(20))) == [value * value for value in range(20)]
+
+
+def test_map_bounded_pending() -> None:
+    submitted = []
+
+    def batches():
+        for value in range(20):
+            submitted.append(value)
+            yield value
+
+    with DalProcessPool(workers=2, max_pending=3) as process_pool:
+        results = process_pool.map(square, batches())
+        assert next(results) == 0
+        assert len(submitted) == 3
+        results.close()
+
+
+def test_map_error() -> None:
+    with DalProcessPool(workers=1) as process_pool:
+        with pytest.raises(TypeError):
+            list(process_pool.map(square, [1, None, 3]))
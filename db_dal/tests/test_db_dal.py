@@ -1,3 +1,6 @@
+import json
+import threading
+import time
 from datetime import datetime
 from enum import StrEnum
 from typing import Optional
@@ -5,11 +8,21 @@ from zoneinfo import ZoneInfo
 
 import pydantic
 import pytest
+import sqlalchemy
 import sqlmodel
+from sqlalchemy import create_mock_engine
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateTable
 
+from db_dal.src.dal_cache import DalCache
+from db_dal.src.dal_filter import DalField
+from db_dal.src.dal_metrics import DalMetrics
+from db_dal.src.dal_process_pool import DalProcessPool
+from db_dal.src.dal_transaction import dal_transaction
 from db_dal.src.db_dal import DbDal, DalKeyNotFoundError
 from db_dal.src.db_engine import connect_to_db_and_create_tables
+from pydantic_db_model.src.db_index.db_index import DbIndex
 from pydantic_db_model.src.pydantic_db_model import generate_db_model
 
 FIRST_AUTO_INT_INDEX = 1
@@ -28,12 +41,58 @@ class HelperStruct(pydantic.BaseModel):
 class Model(pydantic.BaseModel):
     index: Optional[int] = sqlmodel.Field(default=None, primary_key=True)
     d: dict[int, HelperStruct] = {0: HelperStruct()}
-    desc: Optional[str] = None
+    desc: Optional[str] = sqlmodel.Field(default=None, index=True)
 
 
 generate_db_model(Model, fixed_timezone="UTC")
 
 
+class CompositeKeyModel(pydantic.BaseModel):
+    group: str = sqlmodel.Field(primary_key=True)
+    index: int = sqlmodel.Field(primary_key=True)
+    tags: list[str] = []
+
+
+generate_db_model(CompositeKeyModel)
+
+
+class BytesModel(pydantic.BaseModel):
+    index: int = sqlmodel.Field(primary_key=True)
+    data: bytes
+    optional_data: Optional[bytes] = None
+
+
+generate_db_model(BytesModel)
+
+
+class NativeJsonModel(pydantic.BaseModel):
+    index: int = sqlmodel.Field(primary_key=True)
+    tags: list[str] = []
+    attrs: dict[str, int] = {}
+
+
+generate_db_model(NativeJsonModel, native_json=True)
+
+
+class LazyJsonModel(pydantic.BaseModel):
+    index: int = sqlmodel.Field(primary_key=True)
+    d: dict[int, HelperStruct] = {}
+
+
+generate_db_model(LazyJsonModel, lazy_json=True)
+
+
+class IndexedModel(pydantic.BaseModel):
+    __db_indexes__ = [DbIndex("name", "age"), DbIndex(("address", "city"))]
+    index: int = sqlmodel.Field(primary_key=True)
+    name: str = ""
+    age: int = 0
+    address: dict[str, str] = {}
+
+
+generate_db_model(IndexedModel)
+
+
 @pytest.fixture
 def dal() -> DbDal:
     db_engine = connect_to_db_and_create_tables("sqlite:///:memory:")
@@ -65,6 +124,32 @@ def test_get_not_found(dal: DbDal) -> None:
     print(f"\n{repr(e)} raised as expected")
 
 
+def test_get_by_keys_list(dal: DbDal) -> None:
+    tm_list = [Model(index=i, desc=str(i)) for i in range(1, 6)]
+    dal.add_list(tm_list)
+    assert dal.get_by_keys_list([5, 1, 3, 1], batch_size=2) == [tm_list[4], tm_list[0], tm_list[2], tm_list[0]]
+    assert dal.get_by_keys_list([{"index": 2}, Model(index=4)]) == [tm_list[1], tm_list[3]]
+    assert dal.get_by_keys_list([]) == []
+
+
+def test_get_by_keys_list_missing(dal: DbDal) -> None:
+    tm1 = Model(index=1, desc="11")
+    dal.add(tm1)
+    with pytest.raises(DalKeyNotFoundError) as e:
+        dal.get_by_keys_list([7, 1, 8])
+    assert e.value.missing_keys == [{"index": 7}, {"index": 8}]
+    assert dal.get_by_keys_list([7, 1, 8], raise_on_missing=False) == [None, tm1, None]
+
+
+def test_get_by_keys_list_composite_key() -> None:
+    db_engine = connect_to_db_and_create_tables("sqlite:///:memory:")
+    dal = DbDal(db_engine, CompositeKeyModel)
+    ckm_list = [CompositeKeyModel(group=group, index=i, tags=[group]) for group in ("a", "b") for i in range(3)]
+    dal.add_list(ckm_list)
+    keys = [{"group": "b", "index": 2}, {"group": "a", "index": 0}, {"group": "c", "index": 0}]
+    assert dal.get_by_keys_list(keys, raise_on_missing=False) == [ckm_list[5], ckm_list[0], None]
+
+
 def test_get_by_dict(dal: DbDal) -> None:
     tm1 = Model(index=1, desc="11")
     tm2 = Model(index=2, desc="22")
@@ -75,6 +160,69 @@ def test_get_by_dict(dal: DbDal) -> None:
     assert dal.get_by_dict({}) == [tm1, tm2]
 
 
+def test_iter_by_dict(dal: DbDal) -> None:
+    tm_list = [Model(index=i, desc=str(i % 2)) for i in range(1, 6)]
+    dal.add_list(tm_list)
+    assert list(dal.iter_all(chunk_size=2)) == tm_list
+    assert list(dal.iter_by_dict({"desc": "1"}, chunk_size=2)) == tm_list[0::2]
+
+
+def test_iter_closed_early_releases_connection(tmp_path) -> None:
+    db_engine = connect_to_db_and_create_tables(f"sqlite:///{tmp_path / 'iter.db'}")
+    dal = DbDal(db_engine, Model)
+    dal.add_list([Model(index=i) for i in range(1, 6)])
+    records_iterator = dal.iter_all(chunk_size=2)
+    assert next(records_iterator).index == 1
+    assert db_engine.pool.checkedout() == 1
+    records_iterator.close()
+    assert db_engine.pool.checkedout() == 0
+
+
+def test_get_by_dict_order_limit_offset(dal: DbDal) -> None:
+    tm_list = [Model(index=i, desc=str(10 - i)) for i in range(1, 6)]
+    dal.add_list(tm_list)
+    assert dal.get_by_dict({}, order_by="desc") == tm_list[::-1]
+    assert dal.get_by_dict({}, order_by="index", descending=True, limit=2, offset=1) == [tm_list[3], tm_list[2]]
+
+
+@pytest.mark.parametrize("order_by, descending", [(None, False), ("index", True), ("desc", False)])
+def test_get_page(dal: DbDal, order_by: Optional[str], descending: bool) -> None:
+    tm_list = [Model(index=i, desc=str(i % 3)) for i in range(1, 8)]
+    dal.add_list(tm_list)
+    pages = [dal.get_page({}, 3, order_by, descending)]
+    while pages[-1].next_page_token is not None:
+        pages.append(dal.get_page({}, 3, order_by, descending, pages[-1].next_page_token))
+    assert [len(page.records) for page in pages] == [3, 3, 1]
+    assert [tm for page in pages for tm in page.records] == dal.get_by_dict({}, order_by or "index", descending)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_get_page_nulls(dal: DbDal, descending: bool) -> None:
+    tm_list = [Model(index=i, desc=None if i in (2, 5) else str(i % 3)) for i in range(1, 8)]
+    dal.add_list(tm_list)
+    pages = [dal.get_page({}, 2, "desc", descending)]
+    while pages[-1].next_page_token is not None:
+        pages.append(dal.get_page({}, 2, "desc", descending, pages[-1].next_page_token))
+    assert [len(page.records) for page in pages] == [2, 2, 2, 1]
+    sort_key = lambda tm: (tm.desc is not None, tm.desc or "", tm.index)  # SQLite sorts NULLs first
+    assert [tm for page in pages for tm in page.records] == sorted(tm_list, key=sort_key, reverse=descending)
+
+
+def test_get_page_by_key_field() -> None:
+    dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), CompositeKeyModel)
+    dal.add_list([CompositeKeyModel(group=group, index=index) for group in ("a", "b") for index in (2, 1)])
+    first_page = dal.get_page({}, 2, order_by="index")
+    assert [(tm.group, tm.index) for tm in first_page.records] == [("a", 1), ("b", 1)]
+    next_page = dal.get_page({}, 2, order_by="index", page_token=first_page.next_page_token)
+    assert [(tm.group, tm.index) for tm in next_page.records] == [("a", 2), ("b", 2)]
+
+
+def test_get_page_not_indexed() -> None:
+    dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), CompositeKeyModel)
+    with pytest.raises(AssertionError):
+        dal.get_page({}, 10, order_by="tags")
+
+
 def test_add_duplicate_key(dal: DbDal) -> None:
     tm1 = Model(index=1, desc="11")
     tm2 = Model(index=1, desc="22")
@@ -109,11 +257,44 @@ def test_upsert_list(dal: DbDal) -> None:
     assert dal.get_all() == [tm1, tm3, tm4, tm5]
 
 
+def test_upsert_list_batches(dal: DbDal) -> None:
+    dal.add_list([Model(index=1, desc="11"), Model(index=2, desc="22")])
+    tm_list = [Model(index=i, desc=str(i * 100)) for i in range(1, 6)]
+    dal.upsert_list(tm_list, batch_size=2)
+    assert dal.get_all() == tm_list
+
+
+def test_upsert_list_same_key_twice(dal: DbDal) -> None:
+    tm1 = Model(index=1, desc="11")
+    tm2 = Model(index=1, desc="22")
+    dal.upsert_list([tm1, tm2])
+    assert dal.get_all() == [tm2]
+
+
+def test_upsert_auto_key(dal: DbDal) -> None:
+    dal.upsert(Model(desc="11"))
+    assert dal.get_by_key(FIRST_AUTO_INT_INDEX).desc == "11"
+
+
+@pytest.mark.parametrize(
+    "db_url, expected_sql",
+    [
+        ("sqlite://", "ON CONFLICT (\"index\") DO UPDATE"),
+        ("postgresql://", "ON CONFLICT (index) DO UPDATE"),
+        ("mysql://", "ON DUPLICATE KEY UPDATE"),
+    ],
+)
+def test_upsert_statement_dialects(db_url: str, expected_sql: str) -> None:
+    db_engine = create_mock_engine(db_url, executor=None)
+    statement = DbDal(db_engine, Model)._upsert_statement()
+    assert expected_sql in str(statement.compile(dialect=db_engine.dialect))
+
+
 def test_delete_by_dict(dal: DbDal) -> None:
     tm1 = Model(index=1, desc="11")
     tm2 = Model(index=2, desc="22")
     dal.add_list([tm1, tm2])
-    dal.delete_by_dict({"desc": "22"})
+    assert dal.delete_by_dict({"desc": "22"}) == 1
     assert dal.get_all() == [tm1]
     dal.delete_by_dict({})
     assert dal.get_all() == []
@@ -125,3 +306,336 @@ def test_delete_all(dal: DbDal) -> None:
     dal.add_list([tm1, tm2])
     dal.delete_all()
     assert dal.get_all() == []
+
+
+def test_add_list_bulk(dal: DbDal) -> None:
+    tm_list = [Model(index=i, desc=str(i)) for i in range(1, 6)]
+    dal.add_list(tm_list, bulk=True, batch_size=2)
+    assert dal.get_all() == tm_list
+
+
+def test_add_list_bulk_auto_key(dal: DbDal) -> None:
+    dal.add_list([Model(desc="11"), Model(desc="22")], bulk=True)
+    assert [tm.index for tm in dal.get_all()] == [FIRST_AUTO_INT_INDEX, FIRST_AUTO_INT_INDEX + 1]
+
+
+def test_add_list_bulk_duplicate_key(dal: DbDal) -> None:
+    tm1 = Model(index=1, desc="11")
+    tm2 = Model(index=1, desc="22")
+    with pytest.raises(IntegrityError):
+        dal.add_list([tm1, tm2], bulk=True, batch_size=1)
+    assert dal.get_all() == []
+
+
+def test_delete_record(dal: DbDal) -> None:
+    tm1 = Model(index=1, desc="11")
+    tm2 = Model(index=2, desc="22")
+    dal.add_list([tm1, tm2])
+    assert dal.delete_record(Model(index=2, desc="changed")) == 1
+    assert dal.delete_record(tm2) == 0
+    assert dal.get_all() == [tm1]
+
+
+def test_delete_by_keys_list(dal: DbDal) -> None:
+    tm_list = [Model(index=i, desc=str(i)) for i in range(1, 6)]
+    dal.add_list(tm_list)
+    assert dal.delete_by_keys_list([1, {"index": 3}, tm_list[4], 3, 7], batch_size=2) == 3
+    assert dal.get_all() == [tm_list[1], tm_list[3]]
+    assert dal.delete_by_key(2) == 1
+    assert dal.delete_all() == 1
+
+
+def test_cached_get_by_key() -> None:
+    db_engine = connect_to_db_and_create_tables("sqlite:///:memory:")
+    dal = DbDal(db_engine, Model, cache=DalCache())
+    tm = Model(index=1, desc="1")
+    dal.add(tm)
+    assert dal.get_by_key(1) == tm
+    assert dal.get_by_key(1) == tm
+    assert (dal.cache.stats.hits, dal.cache.stats.misses) == (1, 1)
+    dal.get_by_key(1).desc = "changed by caller"
+    assert dal.get_by_key(1) == tm
+
+
+@pytest.mark.parametrize("write", [
+    lambda dal: dal.upsert(Model(index=1, desc="changed")),
+    lambda dal: dal.delete_by_key(1),
+    lambda dal: dal.delete_by_dict({"desc": "1"}),
+])
+def test_cache_invalidated_by_writes(write) -> None:
+    db_engine = connect_to_db_and_create_tables("sqlite:///:memory:")
+    dal = DbDal(db_engine, Model, cache=DalCache())
+    dal.add_list([Model(index=1, desc="1"), Model(index=2, desc="2")])
+    dal.get_by_keys_list([1, 2])
+    write(dal)
+    uncached_dal = DbDal(db_engine, Model)
+    assert dal.get_by_keys_list([1, 2], raise_on_missing=False) == uncached_dal.get_by_keys_list([1, 2], raise_on_missing=False)
+
+
+def test_metrics() -> None:
+    metrics = DalMetrics()
+    dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), Model, cache=DalCache(), metrics=metrics)
+    dal.add_list([Model(index=1), Model(index=2)], bulk=True)
+    dal.get_by_keys_list([1, 2])
+    dal.get_by_keys_list([1, 3], raise_on_missing=False)
+    assert sum(1 for _ in dal.iter_all(chunk_size=1)) == 2
+    stats = metrics.stats()
+    assert (stats[("Model", "add_list")].calls, stats[("Model", "add_list")].rows_in) == (1, 2)
+    keys_stats = stats[("Model", "get_by_keys_list")]
+    assert (keys_stats.calls, keys_stats.rows_out, keys_stats.cache_hits, keys_stats.cache_misses) == (2, 2, 1, 3)
+    assert (stats[("Model", "iter_by_dict")].rows_out, stats[("Model", "iter_by_dict")].errors) == (2, 0)
+    for operation_stats in stats.values():
+        assert operation_stats.sql_seconds + operation_stats.convert_seconds + operation_stats.session_wait_seconds <= operation_stats.total_seconds
+        assert operation_stats.sql_seconds > 0
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_json_export_import(workers: int) -> None:
+    process_pool = DalProcessPool(workers) if workers else None
+    source_dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), Model, process_pool=process_pool)
+    tm_list = [Model(index=i, desc=str(i), d={i: HelperStruct(e=MyEnum.a2)}) for i in range(1, 8)]
+    source_dal.add_list(tm_list)
+    json_chunks = list(source_dal.iter_json({}, chunk_size=3))
+    assert len(json_chunks) == 3
+    json_lines = b"".join(json_chunks).splitlines()
+    assert [Model.model_validate_json(line) for line in json_lines] == tm_list
+    target_dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), Model, process_pool=process_pool)
+    assert target_dal.add_json_list([*json_lines, b""], batch_size=2) == 7
+    assert target_dal.get_all() == tm_list
+    changed_line = tm_list[0].model_copy(update={"desc": "changed"}).model_dump_json()
+    assert target_dal.add_json_list([changed_line, Model(desc="new").model_dump_json()], upsert=True) == 2
+    assert (target_dal.get_by_key(1).desc, target_dal.get_by_key(8).desc, len(target_dal.get_all())) == ("changed", "new", 8)
+    with pytest.raises(pydantic.ValidationError):
+        target_dal.add_json_list(['{"index": "not an int"}'])
+    if process_pool is not None:
+        process_pool.close()
+
+
+def test_ndjson_export_import(tmp_path) -> None:
+    source_dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), Model)
+    tm_list = [Model(index=i, desc=str(i) if i % 2 else None, d={i: HelperStruct(e=MyEnum.a1)}) for i in range(1, 6)]
+    source_dal.add_list(tm_list)
+    with open(tmp_path / "models.ndjson", "wb") as output:
+        assert source_dal.export_ndjson(output, {"desc": "1"}) == 1
+        assert source_dal.export_ndjson(output, where=[Model.__db_model__.index > 1], chunk_size=2) == 4
+    first_line = json.loads((tmp_path / "models.ndjson").read_bytes().splitlines()[0])
+    assert first_line["d"] == pydantic.TypeAdapter(dict[int, HelperStruct]).dump_json(tm_list[0].d).decode()  # JSON column copied as is
+    target_dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), Model)
+    target_dal.add(Model(index=1, desc="to be replaced"))
+    with open(tmp_path / "models.ndjson", "rb") as source:
+        assert target_dal.import_ndjson(source, upsert=True, batch_size=2) == 5
+    assert target_dal.get_all() == tm_list
+
+
+def test_ndjson_bytes_export_import(tmp_path) -> None:
+    source_dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), BytesModel)
+    bm_list = [BytesModel(index=1, data=b"\xff", optional_data=b"\xfb\xff"), BytesModel(index=2, data=b"")]
+    source_dal.add_list(bm_list)
+    with open(tmp_path / "bytes.ndjson", "wb") as output:
+        assert source_dal.export_ndjson(output) == 2
+    target_dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), BytesModel)
+    with open(tmp_path / "bytes.ndjson", "rb") as source:
+        assert target_dal.import_ndjson(source) == 2
+    assert target_dal.get_all() == bm_list
+
+
+@pytest.mark.parametrize("file_format", ["arrow", "parquet"])
+def test_arrow_export_import(tmp_path, file_format: str) -> None:
+    pytest.importorskip("pyarrow")
+    source_dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), IndexedModel)
+    records = [IndexedModel(index=i, name=f"name {i}", age=i, address={"city": str(i)}) for i in range(5)]
+    source_dal.add_list(records)
+    assert source_dal.export_arrow(tmp_path / "records", file_format, chunk_size=2) == 5
+    target_dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), IndexedModel)
+    assert target_dal.import_arrow(tmp_path / "records", file_format, batch_size=3) == 5
+    assert target_dal.get_all() == records
+
+
+def test_count_exists_aggregates() -> None:
+    dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), IndexedModel)
+    assert (dal.count(), dal.exists(), dal.max("age"), dal.count_by("age")) == (0, False, None, {})
+    dal.add_list([IndexedModel(index=i, name=f"name {i % 2}", age=10 * i, address={"city": "Paris"}) for i in range(1, 6)])
+    assert (dal.count(), dal.count({"name": "name 1"}), dal.count(DalField("age") > 20)) == (5, 3, 3)
+    assert (dal.exists({"age": 30}), dal.exists(DalField("age") > 50)) == (True, False)
+    assert (dal.min("age"), dal.max("age", {"name": "name 0"}), dal.sum("age"), dal.aggregate("sum", "index")) == (10, 40, 150, 15)
+    assert dal.count_by("name") == {"name 0": 2, "name 1": 3}
+    assert dal.count_by("name", DalField("age") >= 30) == {"name 0": 1, "name 1": 2}
+    with pytest.raises(AssertionError):
+        dal.max("address")
+    with pytest.raises(AssertionError):
+        dal.aggregate("avg", "age")
+    assert str(dal._exists_statement({"age": 30}).compile(compile_kwargs={"literal_binds": True})).endswith("LIMIT 1")
+
+
+def test_transaction_commits_once(tmp_path) -> None:
+    db_engine = connect_to_db_and_create_tables(f"sqlite:///{tmp_path}/transaction.db")
+    dal = DbDal(db_engine, Model)
+    commits = []
+    sqlalchemy.event.listen(db_engine, "commit", lambda connection: commits.append(connection))
+    with dal_transaction(db_engine):
+        dal.add(Model(index=1, desc="1"))
+        dal.upsert_list([Model(index=2), Model(index=3)])
+        dal.delete_by_key(3)
+        assert [tm.index for tm in dal.get_all()] == [1, 2]
+        assert DbDal(connect_to_db_and_create_tables(f"sqlite:///{tmp_path}/transaction.db"), Model).get_all() == []
+    assert len(commits) == 1
+    assert [tm.index for tm in dal.get_all()] == [1, 2]
+
+
+def test_transaction_rollback(dal: DbDal) -> None:
+    dal.add(Model(index=1))
+    with pytest.raises(DalKeyNotFoundError):
+        with dal_transaction(dal.db_engine):
+            dal.add(Model(index=2))
+            dal.delete_by_key(1)
+            dal.get_by_key(3)
+    assert [tm.index for tm in dal.get_all()] == [1]
+
+
+def test_nested_transaction_rollback(dal: DbDal) -> None:
+    with dal_transaction(dal.db_engine):
+        dal.add(Model(index=1))
+        with pytest.raises(IntegrityError):
+            with dal_transaction(dal.db_engine):
+                dal.add(Model(index=2))
+                dal.add(Model(index=1))
+        dal.add(Model(index=3))
+    assert [tm.index for tm in dal.get_all()] == [1, 3]
+
+
+def test_transaction_concurrent_read_then_write(tmp_path) -> None:
+    db_engine = connect_to_db_and_create_tables(f"sqlite:///{tmp_path}/concurrent.db")
+    dal = DbDal(db_engine, Model)
+    dal.add(Model(index=1, desc="0"))
+    read_done = threading.Event()
+
+    def concurrent_upsert() -> None:
+        read_done.wait()
+        dal.upsert(Model(index=1, desc="concurrent"))  # Waits for the transaction's write lock
+
+    writer = threading.Thread(target=concurrent_upsert)
+    writer.start()
+    with dal_transaction(db_engine):
+        tm = dal.get_by_key(1)
+        read_done.set()
+        time.sleep(0.2)
+        dal.upsert(Model(index=1, desc=str(int(tm.desc) + 1)))
+    writer.join()
+    assert dal.get_by_key(1).desc == "concurrent"
+
+
+def test_transaction_cache_invalidation() -> None:
+    db_engine = connect_to_db_and_create_tables("sqlite:///:memory:")
+    dal = DbDal(db_engine, Model, cache=DalCache())
+    dal.add(Model(index=1, desc="1"))
+    with dal_transaction(db_engine):
+        dal.upsert(Model(index=1, desc="changed"))
+        assert dal.get_by_key(1).desc == "changed"
+        assert len(dal.cache) == 0
+    assert dal.get_by_key(1).desc == "changed"
+    with pytest.raises(DalKeyNotFoundError):
+        with dal_transaction(db_engine):
+            dal.upsert(Model(index=1, desc="rolled back"))
+            dal.get_by_key(2)
+    assert dal.get_by_key(1).desc == "changed"
+
+
+def test_native_json_predicates() -> None:
+    dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), NativeJsonModel)
+    tm_list = [NativeJsonModel(index=1, tags=["a", "b"], attrs={"x": 1}), NativeJsonModel(index=2, tags=["c"], attrs={"x": 5})]
+    dal.add_list(tm_list)
+    assert dal.get_all() == tm_list
+    assert dal.get_by_dict({}, where=[dal.json_contains("tags", "b")]) == [tm_list[0]]
+    assert dal.get_by_dict({}, where=[dal.json_contains("tags", "x")]) == []
+    assert dal.get_by_dict({}, where=[dal.json_path("attrs", "x") > 2]) == [tm_list[1]]
+    assert list(dal.iter_by_dict({}, where=[dal.json_path("tags", 0) == "a"])) == [tm_list[0]]
+
+
+@pytest.mark.parametrize(
+    "db_url, expected_type, expected_sql",
+    [
+        ("postgresql://", "JSONB", """"NativeJsonModel".tags @> CAST(%(json_value_1)s AS JSONB) AND CAST(("NativeJsonModel".attrs #>> '{x}') AS INTEGER) > %(param_1)s"""),
+        ("mysql://", "JSON", """JSON_CONTAINS(`NativeJsonModel`.tags, %s) = 1 AND CAST(JSON_UNQUOTE(JSON_EXTRACT(`NativeJsonModel`.attrs, '$."x"')) AS SIGNED INTEGER) > %s"""),
+    ],
+)
+def test_native_json_dialects(db_url: str, expected_type: str, expected_sql: str) -> None:
+    db_engine = create_mock_engine(db_url, executor=None)
+    dal = DbDal(db_engine, NativeJsonModel)
+    statement = dal._select_statement({}, [dal.json_contains("tags", "b"), dal.json_path("attrs", "x", type_=sqlalchemy.Integer()) > 2])
+    assert expected_sql in str(statement.compile(dialect=db_engine.dialect))
+    assert f"tags {expected_type} NOT NULL" in str(CreateTable(NativeJsonModel.__db_model__.__table__).compile(dialect=db_engine.dialect))
+
+
+@pytest.mark.parametrize("decoded_value, json_value", [("abc", '"abc"'), (None, "null"), (["a", "b"], '["a", "b"]'), ({"x": 1}, '{"x": 1}')])
+def test_native_json_postgresql_results(decoded_value, json_value: str) -> None:
+    column_type = NativeJsonModel.__db_model__.__table__.columns["tags"].type
+    process = column_type._cached_result_processor(postgresql.dialect(), None)
+    assert process(decoded_value) == json_value
+
+
+def test_json_path_expression_index() -> None:
+    db_engine = connect_to_db_and_create_tables("sqlite:///:memory:")
+    dal = DbDal(db_engine, IndexedModel)
+    statement = dal._select_statement({}, [dal.json_path("address", "city") == "Paris"])
+    with db_engine.connect() as connection:
+        query_plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement.compile(db_engine, compile_kwargs={'literal_binds': True})}").all()
+    assert "USING INDEX ix_IndexedModel_address_city" in str(query_plan)
+
+
+def test_unindexed_filters() -> None:
+    dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), IndexedModel)
+    dal.get_by_dict({"name": "a", "age": 1})
+    dal.get_by_dict({"age": 1})
+    dal.delete_by_dict({"address": "{}"})
+    assert dal.unindexed_filters() == [("address",), ("age",)]
+    assert dal.unindexed_filters([["index"], ["age", "name"], ["address", "name"]]) == []
+
+
+def test_get_fields_by_dict(dal: DbDal) -> None:
+    tm_list = [Model(index=1, desc="1"), Model(index=2, desc="2", d={})]
+    dal.add_list(tm_list)
+    assert dal.get_fields_by_dict({}, ["index", "desc"], order_by="index", descending=True) == [
+        {"index": 2, "desc": "2"}, {"index": 1, "desc": "1"},
+    ]
+    assert dal.get_fields_by_dict({"desc": "1"}, ["d"]) == [{"d": tm_list[0].d}]
+    partial_tm, = dal.get_fields_by_dict({"index": 2}, ["index", "d"], as_model=True)
+    assert isinstance(partial_tm, Model)
+    assert (partial_tm.index, partial_tm.d, partial_tm.model_fields_set) == (2, {}, {"index", "d"})
+
+
+def test_trusted_reads() -> None:
+    dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), Model, trusted_reads=True)
+    tm_list = [Model(index=1, d={1: HelperStruct(e=MyEnum.a1)}), Model(index=2, desc="2")]
+    dal.add_list(tm_list)
+    assert dal.get_all() == dal.get_all(trusted=False) == tm_list
+    assert dal.get_by_key(1) == tm_list[0]
+    assert dal.get_page({}, page_size=1).records == [tm_list[0]]
+    assert list(dal.iter_all(chunk_size=1)) == tm_list
+    read_tm = dal.get_by_key(1)
+    assert isinstance(read_tm.d[1], HelperStruct) and read_tm.d[1].e is MyEnum.a1
+    assert read_tm.d[1].dt.tzinfo is not None
+    assert read_tm.model_fields_set == set(Model.model_fields)
+
+
+def test_lazy_json_model() -> None:
+    dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), LazyJsonModel, cache=DalCache())
+    tm = LazyJsonModel(index=1, d={1: HelperStruct(e=MyEnum.a1)})
+    dal.add(tm)
+    lazy_tm = dal.get_by_key(1)
+    dal.upsert(lazy_tm)
+    assert dal.get_by_key(1) == tm
+    lazy_tm = dal.get_by_key(1)
+    lazy_tm.d[1].e = MyEnum.a2
+    dal.upsert(lazy_tm)
+    assert dal.get_all() == [lazy_tm]
+
+
+def test_lazy_json_model_json_export() -> None:
+    source_dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), LazyJsonModel)
+    tm_list = [LazyJsonModel(index=i, d={i: HelperStruct(e=MyEnum.a2)}) for i in range(1, 4)]
+    source_dal.add_list(tm_list)
+    json_lines = b"".join(source_dal.iter_json({})).splitlines()
+    assert json_lines == [tm.model_dump_json().encode() for tm in tm_list]
+    target_dal = DbDal(connect_to_db_and_create_tables("sqlite:///:memory:"), LazyJsonModel)
+    target_dal.add_json_list(json_lines)
+    assert target_dal.get_all() == tm_list
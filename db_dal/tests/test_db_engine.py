@@ -0,0 +1,27 @@
+import sqlalchemy
+
+from db_dal.src.db_engine import connect_to_db_and_create_tables, create_db_tables, DbEngineSettings, SqlitePragmas
+
+
+def test_sqlite_file_db_pragmas_and_pool(tmp_path) -> None:
+    settings = DbEngineSettings(pool_size=3, max_overflow=1, sqlite_pragmas=SqlitePragmas(cache_size=-2000))
+    db_engine = connect_to_db_and_create_tables(f"sqlite:///{tmp_path / 'engine.db'}", settings)
+    with db_engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert connection.exec_driver_sql("PRAGMA cache_size").scalar() == -2000
+    assert db_engine.pool.size() == 3
+    assert db_engine.pool._pre_ping
+
+
+def test_sqlite_memory_db() -> None:
+    db_engine = connect_to_db_and_create_tables("sqlite:///:memory:")
+    with db_engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+
+
+def test_deferred_tables_creation(tmp_path) -> None:
+    db_engine = connect_to_db_and_create_tables(f"sqlite:///{tmp_path / 'deferred.db'}", create_tables=False)
+    assert sqlalchemy.inspect(db_engine).get_table_names() == []
+    create_db_tables(db_engine)
+    assert sqlalchemy.inspect(db_engine).get_table_names() != []
@@ -2,6 +2,7 @@ from datetime import datetime
 from zoneinfo import ZoneInfo
 
 import pydantic
+import sqlalchemy
 import sqlmodel
 from pydantic_db_model.src.pydantic_db_model import generate_db_model
 from db_dal.src.db_engine import connect_to_db_and_create_tables
@@ -16,7 +17,7 @@ class PersonModel(pydantic.BaseModel):
     created_datetime: datetime = datetime.now(ZoneInfo("UTC"))
 
 
-generate_db_model(PersonModel, ZoneInfo("UTC"))
+generate_db_model(PersonModel, ZoneInfo("UTC"), native_json=True)
 
 
 class PersonDal(DbDal):
@@ -24,12 +25,20 @@ class PersonDal(DbDal):
         """
         Example for a query filter:
         The desired result is to filter for a specific hobby in a list of hobbies.
-        Because the hobbies field is flattened to a JSON string,
-        the same result is gained by checking for the hobby substring in the hobbies JSON string.
+        Because the hobbies field is stored in a native JSON column (native_json=True),
+        the DB checks the hobby is an item of the hobbies list (which PostgreSQL can serve from a GIN index).
+        """
+        return self.get_by_dict({}, where=[self.json_contains("hobbies", hobby)])
+
+    def get_by_hobby_substring(self, hobby: str) -> list[PersonModel]:
+        """
+        Example for a custom query:
+        Without native_json, composite fields are flattened to JSON strings,
+        so the same result is gained by checking for the hobby substring in the hobbies JSON string.
         """
         with sqlmodel.Session(self.db_engine) as session:
             db_model = self.model.__db_model__
-            statement = sqlmodel.select(db_model).where(db_model.hobbies.contains(f'"{hobby}"'))
+            statement = sqlmodel.select(db_model).where(sqlalchemy.cast(db_model.hobbies, sqlalchemy.String).contains(f'"{hobby}"'))
             db_results = session.exec(statement).all()
             return [from_flat_model(result, self.model) for result in db_results]
 
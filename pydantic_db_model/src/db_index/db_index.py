@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import sqlalchemy
+import sqlmodel
+from sqlalchemy.types import TypeEngine
+
+from pydantic_db_model.src.json_sql.json_sql import json_path
+
+
+DbIndexColumn = str | tuple[str | int, ...]
+# A field name, or a JSON path in a composite field: (field name, *path keys / list indexes)
+
+
+@dataclass(init=False, frozen=True)
+class DbIndex:
+    """
+    A secondary index of the generated db model, declared in the pydantic model's __db_indexes__ list:
+
+    class PersonModel(pydantic.BaseModel):
+        __db_indexes__ = [DbIndex("name", "created_datetime"), DbIndex(("address", "city"))]
+        ...
+
+    JSON path columns become expression indexes (on json_sql.json_path), which serve the same json_path()
+    expressions in queries. type_ casts their values (required by MySQL, which can't index JSON text).
+    On PostgreSQL, JSON paths of text (not native_json) columns index the column cast to JSONB, as json_path queries it.
+    """
+    columns: tuple[DbIndexColumn, ...]
+    name: str
+    unique: bool
+    type_: Optional[TypeEngine]
+
+    def __init__(self, *columns: DbIndexColumn, name: str = "", unique: bool = False, type_: Optional[TypeEngine] = None):
+        assert columns, "DbIndex requires at least one column"
+        object.__setattr__(self, "columns", columns)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "unique", unique)
+        object.__setattr__(self, "type_", type_)
+
+
+def create_db_indexes(db_model: type[sqlmodel.SQLModel], db_indexes: list[DbIndex]) -> None:
+    """
+    Adds the db_indexes to db_model's table, so they're created with it.
+    """
+    table = db_model.__table__
+    for db_index in db_indexes:
+        expressions = [_index_expression(table, column, db_index.type_) for column in db_index.columns]
+        sqlalchemy.Index(db_index.name or _index_name(table.name, db_index.columns), *expressions, unique=db_index.unique)
+
+
+def _index_expression(table: sqlalchemy.Table, column: DbIndexColumn, type_: Optional[TypeEngine]) -> sqlalchemy.ColumnElement:
+    field_name, *path = (column,) if isinstance(column, str) else column
+    assert field_name in table.columns, f"{field_name=} - DbIndex column must be a field of {table.name}"
+    if not path:
+        return table.columns[field_name]
+    return json_path(table.columns[field_name], *path, type_=type_)
+
+
+def _index_name(table_name: str, columns: tuple[DbIndexColumn, ...]) -> str:
+    column_names = ("_".join(map(str, column)) if isinstance(column, tuple) else column for column in columns)
+    return f"ix_{table_name}_{'_'.join(column_names)}"
@@ -1,27 +1,69 @@
 from datetime import datetime, tzinfo
-from zoneinfo import ZoneInfo
+from functools import cache
+from typing import Any, Iterable, Optional
 
 import pydantic
 
+from pydantic_db_model.src.pydantic_to_flat.src.create_flat_model import is_type_included
+
+
+@cache
+def datetime_field_names(flat_model: type[pydantic.BaseModel]) -> tuple[str, ...]:
+    """
+    Returns the names of the datetime fields of a flat model. Computed once per model.
+    """
+    return tuple(name for name, field_info in flat_model.model_fields.items() if is_type_included(field_info.annotation, (datetime,)))
+
 
 def verify_datetime_fields_are_timezone_aware(model_obj: pydantic.BaseModel) -> None:
     """
-    Verifies that all datetime fields are timezone aware (timezone defined).
+    Verifies that all datetime fields of a flat model object are timezone aware (timezone defined).
     """
     assert isinstance(model_obj, pydantic.BaseModel), f"py_obj={repr(model_obj)} must be a pydantic.BaseModel class/subclass"
-    for key, value in model_obj.model_dump().items():
+    for key in datetime_field_names(model_obj.__class__):
+        value = getattr(model_obj, key)
+        assert value is None or value.tzinfo is not None, (
+            f"There is an error in {repr(model_obj)}: timezone is not defined in datetime field {key}={value}"
+        )
+
+
+def verify_datetime_values_are_timezone_aware(values: dict[str, Any], field_names: Optional[Iterable[str]] = None) -> None:
+    """
+    Verifies that all datetime values (of field_names, or of all fields) of a fields dict are timezone aware (timezone defined).
+    """
+    for key in values if field_names is None else field_names:
+        value = values[key]
         if isinstance(value, datetime):
             assert value.tzinfo is not None, (
-                f"There is an error in {repr(model_obj)}: timezone is not defined in datetime field {key}={value}"
+                f"There is an error in {values}: timezone is not defined in datetime field {key}={value}"
             )
 
 
 def set_missing_timezone_in_model(model_obj: pydantic.BaseModel, fixed_timezone: tzinfo) -> None:
     """
-    If fixed_timezone is set, all naive (undefined timezone) target datetime fields are set to fixed_timezone.
+    All naive (undefined timezone) datetime fields of a flat model object are set to fixed_timezone.
     """
     assert isinstance(model_obj, pydantic.BaseModel), f"flat_obj={repr(model_obj)} must be a pydantic.BaseModel class/subclass"
-    for key, value in model_obj.model_dump().items():
+    for key in datetime_field_names(model_obj.__class__):
+        value = getattr(model_obj, key)
+        if value is not None and value.tzinfo is None:
+            setattr(model_obj, key, value.replace(tzinfo=fixed_timezone))
+
+
+def set_missing_timezone_in_column(values: list[Optional[datetime]], fixed_timezone: tzinfo) -> list[Optional[datetime]]:
+    """
+    Returns the values of a datetime column (of a batch of rows), with naive values set to fixed_timezone.
+    """
+    return [
+        value.replace(tzinfo=fixed_timezone) if value is not None and value.tzinfo is None else value
+        for value in values
+    ]
+
+
+def set_missing_timezone_in_values(values: dict[str, Any], fixed_timezone: tzinfo) -> None:
+    """
+    Sets all naive (undefined timezone) datetime values of a fields dict to fixed_timezone.
+    """
+    for key, value in values.items():
         if isinstance(value, datetime) and value.tzinfo is None:
-                value = value.replace(tzinfo=fixed_timezone)
-                # TODO: check this updates the real object...
+            values[key] = value.replace(tzinfo=fixed_timezone)
@@ -0,0 +1,140 @@
+import json
+from typing import Any, Optional
+
+import sqlalchemy
+from sqlalchemy import ColumnElement, TypeDecorator
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+from sqlalchemy.types import TypeEngine
+
+
+class NativeJson(TypeDecorator):
+    """
+    Native JSON column type (JSONB on PostgreSQL, JSON on MySQL & SQLite) for flattened composite fields.
+    The flat model keeps JSON strings, which are passed to & from the DB as is (no extra encoding / decoding),
+    while the DB stores, validates & indexes them as JSON documents.
+    """
+    impl = sqlalchemy.JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect: sqlalchemy.Dialect) -> TypeEngine:
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.JSONB())
+        return dialect.type_descriptor(sqlalchemy.JSON())
+
+    def bind_processor(self, dialect: sqlalchemy.Dialect) -> None:
+        return None
+
+    def result_processor(self, dialect: sqlalchemy.Dialect, coltype: Any):
+        if dialect.name == "postgresql":
+            # PostgreSQL drivers (psycopg2, asyncpg) return JSONB values decoded: a JSON string document as a str,
+            # the JSON null document as None, so they are all encoded back
+            return json.dumps
+
+        def process(value: Any) -> Optional[str]:
+            return value if value is None or isinstance(value, str) else json.dumps(value)
+        return process
+
+
+class json_path(FunctionElement):
+    """
+    The value at path (keys & list indexes) of a JSON column, e.g. json_path(PersonDbModel.address, "city").
+    SQLite returns it with its JSON type, PostgreSQL & MySQL as text, unless type_ is given (then it's CAST to type_).
+    The column may be a native JSON column or a JSON text one (cast to JSONB on PostgreSQL), same for json_contains.
+    The path is rendered literally (not as a bound parameter), so the same expression can back an expression index.
+    """
+    name = "json_path"
+    inherit_cache = True
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ("path", InternalTraversal.dp_plain_obj),
+        ("is_cast", InternalTraversal.dp_boolean),
+        ("type", InternalTraversal.dp_type),
+    ]
+
+    def __init__(self, column: ColumnElement, *path: str | int, type_: Optional[TypeEngine] = None):
+        assert path, "json_path() requires at least one path key / index"
+        assert all(isinstance(step, int) or '"' not in step for step in path), f"{path=} - JSON path keys can't contain double quotes"
+        self.path = path
+        self.is_cast = type_ is not None
+        super().__init__(column)
+        self.type = type_ if type_ is not None else sqlalchemy.String()
+
+    def _path_str(self) -> str:
+        return "$" + "".join(f"[{step}]" if isinstance(step, int) else f'."{step}"' for step in self.path)
+
+
+class json_contains(FunctionElement):
+    """
+    True if value is contained in a JSON column: an item of a JSON list, or (on PostgreSQL & MySQL only)
+    a sub-document of it, e.g. json_contains(PersonDbModel.hobbies, "hiking").
+    PostgreSQL can serve it from a GIN index, and MySQL from a multi-valued index.
+    """
+    name = "json_contains"
+    inherit_cache = True
+    _traverse_internals = FunctionElement._traverse_internals + [("is_scalar", InternalTraversal.dp_boolean)]
+    type = sqlalchemy.Boolean()
+
+    def __init__(self, column: ColumnElement, value: Any):
+        self.is_scalar = not isinstance(value, (dict, list))
+        super().__init__(
+            column,
+            sqlalchemy.bindparam("json_value", json.dumps(value), type_=sqlalchemy.String(), unique=True),
+            sqlalchemy.bindparam("scalar_value", value if self.is_scalar else None, unique=True),
+        )
+
+
+@compiles(json_path)
+def _compile_json_path(element: json_path, compiler: sqlalchemy.sql.compiler.SQLCompiler, **kw) -> str:
+    column, = element.clauses
+    path = compiler.render_literal_value(element._path_str(), sqlalchemy.String())
+    return f"json_extract({compiler.process(column, **kw)}, {path})"
+
+
+@compiles(json_path, "postgresql")
+def _compile_json_path_postgresql(element: json_path, compiler: sqlalchemy.sql.compiler.SQLCompiler, **kw) -> str:
+    column, = element.clauses
+    path = compiler.render_literal_value("{" + ",".join(str(step) for step in element.path) + "}", sqlalchemy.String())
+    return _cast(f"({_jsonb_column(column, compiler, **kw)} #>> {path})", element, compiler, **kw)
+
+
+@compiles(json_path, "mysql")
+def _compile_json_path_mysql(element: json_path, compiler: sqlalchemy.sql.compiler.SQLCompiler, **kw) -> str:
+    column, = element.clauses
+    path = compiler.render_literal_value(element._path_str(), sqlalchemy.String())
+    return _cast(f"JSON_UNQUOTE(JSON_EXTRACT({compiler.process(column, **kw)}, {path}))", element, compiler, **kw)
+
+
+def _jsonb_column(column: ColumnElement, compiler: sqlalchemy.sql.compiler.SQLCompiler, **kw) -> str:
+    # PostgreSQL's JSON operators don't apply to text: composite fields stored as text (without native_json) are cast
+    column_sql = compiler.process(column, **kw)
+    return column_sql if isinstance(column.type, (NativeJson, sqlalchemy.JSON)) else f"CAST({column_sql} AS JSONB)"
+
+
+def _cast(sql: str, element: json_path, compiler: sqlalchemy.sql.compiler.SQLCompiler, **kw) -> str:
+    if not element.is_cast:
+        return sql
+    return compiler.process(sqlalchemy.cast(sqlalchemy.literal_column(sql), element.type), **kw)
+
+
+@compiles(json_contains)
+def _compile_json_contains(element: json_contains, compiler: sqlalchemy.sql.compiler.SQLCompiler, **kw) -> str:
+    column, _json_value, scalar_value = element.clauses
+    assert element.is_scalar, "json_contains() of a dict / list value is not supported on SQLite"
+    return (
+        f"EXISTS (SELECT 1 FROM json_each({compiler.process(column, **kw)}) "
+        f"WHERE json_each.value = {compiler.process(scalar_value, **kw)})"
+    )
+
+
+@compiles(json_contains, "postgresql")
+def _compile_json_contains_postgresql(element: json_contains, compiler: sqlalchemy.sql.compiler.SQLCompiler, **kw) -> str:
+    column, json_value, _scalar_value = element.clauses
+    return f"{_jsonb_column(column, compiler, **kw)} @> CAST({compiler.process(json_value, **kw)} AS JSONB)"
+
+
+@compiles(json_contains, "mysql")
+def _compile_json_contains_mysql(element: json_contains, compiler: sqlalchemy.sql.compiler.SQLCompiler, **kw) -> str:
+    column, json_value, _scalar_value = element.clauses
+    return f"JSON_CONTAINS({compiler.process(column, **kw)}, {compiler.process(json_value, **kw)})"
@@ -1,18 +1,36 @@
 from datetime import tzinfo
-from typing import Optional
+from zoneinfo import ZoneInfo
+from typing import Optional, Any, Sequence
 
 import pydantic
+import sqlalchemy
 import sqlmodel
 from sqlmodel import SQLModel
 
-from pydantic_db_model.src.fix_missing_timezone.fix_missing_timezone import verify_datetime_fields_are_timezone_aware, set_missing_timezone_in_model
+from pydantic_db_model.src.db_index.db_index import create_db_indexes
+from pydantic_db_model.src.fix_missing_timezone.fix_missing_timezone import verify_datetime_fields_are_timezone_aware, \
+    verify_datetime_values_are_timezone_aware, datetime_field_names, set_missing_timezone_in_column
+from pydantic_db_model.src.json_sql.json_sql import NativeJson
 from pydantic_db_model.src.pydantic_to_flat.src import convert
-from pydantic_db_model.src.pydantic_to_flat.src.convert import from_flat_model
+from pydantic_db_model.src.pydantic_to_flat.src.convert import is_json_str_field
 from pydantic_db_model.src.pydantic_to_flat.src.create_flat_model import generate_flat_fields_definition_dict, \
-    validate_flat_pydantic_model
+    validate_flat_pydantic_model, PydanticFieldDefinition, JSON_KEY_MARK
 
 
-def generate_db_model[T: type[pydantic.BaseModel]](cls: T, fixed_timezone: Optional[tzinfo] = None, table_name: str = "") -> T:
+_NATIVE_JSON_FIELD_DEFINITION: PydanticFieldDefinition = (
+    str,
+    sqlmodel.Field(sa_type=NativeJson, schema_extra={"json_schema_extra": {JSON_KEY_MARK: True}})
+    # Composite fields are still converted into JSON strings, but stored in native JSON columns
+)
+
+
+def generate_db_model[T: type[pydantic.BaseModel]](
+        cls: T,
+        fixed_timezone: Optional[tzinfo | str] = None,
+        table_name: str = "",
+        native_json: bool = False,
+        lazy_json: bool = False,
+) -> T:
     """
     This function should be called immediately after pydantic.BaseModel class definition.
     It generates a flat Pydantic SqlModel and saves it in __db_model__ class property.
@@ -24,22 +42,46 @@ def generate_db_model[T: type[pydantic.BaseModel]](cls: T, fixed_timezone: Optio
         d: dict[int, str]
 
     generate_db_model(Model)
+
+    Secondary indexes (composite, or on JSON paths of composite fields) are declared by a __db_indexes__
+    list of DbIndex in the class (flat fields can also use sqlmodel.Field(index=True)).
+
+    With native_json set, composite fields are stored in the DB native JSON columns (JSONB on PostgreSQL,
+    JSON on MySQL & SQLite) instead of text columns, so they can be queried (& indexed) by json_sql predicates.
+
+    With lazy_json set, db_model_to_pydantic() returns lazy instances (of a cls subclass), whose composite fields
+    are only decoded from JSON on first access. See lazy_json.LazyJsonMixin.
     """
-    cls.__db_model__ = _create_db_model(cls, fixed_timezone, table_name)
+    cls.__db_model__ = _create_db_model(cls, fixed_timezone, table_name, native_json, lazy_json)
     return cls
 
 
-def _create_db_model(cls: type[pydantic.BaseModel], fixed_timezone: Optional[tzinfo] = None, table_name: str = "") -> type[sqlmodel.SQLModel]:
+def _create_db_model(
+        cls: type[pydantic.BaseModel],
+        fixed_timezone: Optional[tzinfo | str] = None,
+        table_name: str = "",
+        native_json: bool = False,
+        lazy_json: bool = False,
+) -> type[sqlmodel.SQLModel]:
+    fields_definition = generate_flat_fields_definition_dict(cls)
+    if native_json:
+        fields_definition = {
+            name: _NATIVE_JSON_FIELD_DEFINITION if is_json_str_field(field_info) else (annotation, field_info)
+            for name, (annotation, field_info) in fields_definition.items()
+        }
     db_model = pydantic.create_model(
         f"{cls.__name__}DbModel",
         __base__=sqlmodel.SQLModel,
         __cls_kwargs__={"table": True},
         __tablename__=table_name or cls.__name__,
-        **generate_flat_fields_definition_dict(cls),
+        **fields_definition,
     )
     db_model.__pydantic_model__ = cls
-    db_model.__fixed_timezone__ = fixed_timezone
+    db_model.__fixed_timezone__ = ZoneInfo(fixed_timezone) if isinstance(fixed_timezone, str) else fixed_timezone
+    db_model.__lazy_json__ = lazy_json
+    create_db_indexes(db_model, getattr(cls, "__db_indexes__", []))
     validate_flat_pydantic_model(db_model)
+    convert.get_converter(cls, db_model)  # Builds the cached conversion plan once, ahead of the first conversion
     return db_model
 
 
@@ -54,10 +96,66 @@ def pydantic_to_db_model(py_obj: pydantic.BaseModel) -> SQLModel:
     return flat_obj
 
 
+def pydantic_to_db_dict(py_obj: pydantic.BaseModel) -> dict[str, Any]:
+    """
+    Returns the flat DB model fields values of py_obj, as a dict (without building a DB model instance).
+    Used for bulk statements, which take plain column values.
+    """
+    assert hasattr(py_obj, "__db_model__"), f"Use generate_db_model({py_obj.__class__.__name__}) after class definition to create and link it to a db_model"
+    flat_dict = convert.get_converter(py_obj.__class__, py_obj.__db_model__).to_flat_dict(py_obj)
+    if py_obj.__db_model__.__fixed_timezone__:
+        verify_datetime_values_are_timezone_aware(flat_dict, datetime_field_names(py_obj.__db_model__))
+    return flat_dict
+
+
 def db_model_to_pydantic(db_obj: SQLModel) -> pydantic.BaseModel:
     """
     Returns a pydantic model, from db_obj
     """
-    if db_obj.__fixed_timezone__:
-        set_missing_timezone_in_model(db_obj, db_obj.__fixed_timezone__)
-    return from_flat_model(db_obj, db_obj.__pydantic_model__)
+    return db_models_to_pydantic([db_obj])[0]
+
+
+def db_models_to_pydantic(db_objs: Sequence[SQLModel], trusted: bool = False) -> list[pydantic.BaseModel]:
+    """
+    Returns pydantic models, from a batch of db_objs of the same db model (see db_rows_to_pydantic).
+    """
+    if not db_objs:
+        return []
+    db_model = db_objs[0].__class__
+    field_names = convert.get_converter(db_model.__pydantic_model__, db_model).field_names
+    return db_rows_to_pydantic(db_model, [tuple(getattr(db_obj, name) for name in field_names) for db_obj in db_objs], trusted)
+
+
+def db_select_columns(db_model: type[SQLModel]) -> list[sqlalchemy.Column]:
+    """
+    Returns the db_model table columns, in the order of the rows expected by db_rows_to_pydantic,
+    e.g. for session.execute(sqlalchemy.select(*db_select_columns(db_model))).
+    """
+    field_names = convert.get_converter(db_model.__pydantic_model__, db_model).field_names
+    return [db_model.__table__.columns[name] for name in field_names]
+
+
+def db_rows_to_pydantic(
+        db_model: type[SQLModel],
+        rows: Sequence[Sequence[Any]],
+        trusted: bool = False,
+        eager: bool = False,
+) -> list[pydantic.BaseModel]:
+    """
+    Returns pydantic models, from a batch of raw db_model rows (tuples of db_select_columns values),
+    without building db_model instances.
+    The rows are converted column-wise: the fixed timezone is set & each JSON column is decoded in one pass,
+    then all the models are validated together (see FlatConverter.from_flat_columns).
+    trusted skips that models validation, for rows written by this package (validated on write).
+    eager returns regular (not lazy) models of lazy_json db models, for callers reading all their fields (e.g. serializers).
+    """
+    if not rows:
+        return []
+    converter = convert.get_converter(db_model.__pydantic_model__, db_model)
+    columns = dict(zip(converter.field_names, map(list, zip(*rows))))
+    if db_model.__fixed_timezone__:
+        for name in datetime_field_names(db_model):
+            columns[name] = set_missing_timezone_in_column(columns[name], db_model.__fixed_timezone__)
+    if db_model.__lazy_json__ and not eager:
+        return converter.from_flat_columns_lazy(columns, trusted)
+    return converter.from_flat_columns(columns, trusted)
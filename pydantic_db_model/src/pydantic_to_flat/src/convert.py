@@ -1,10 +1,10 @@
-from datetime import datetime
-from typing import Type, Any, Optional
-from zoneinfo import ZoneInfo
+from functools import cache, cached_property
+from typing import Type, Any, Sequence
 
 import pydantic
 
 from .create_flat_model import validate_flat_pydantic_model, JSON_KEY_MARK
+from .lazy_json import get_lazy_model, new_lazy_instance, lazy_json_values, instance_dict, LazyJsonMixin
 
 
 def to_flat_model[T: pydantic.BaseModel](py_obj: pydantic.BaseModel, flat_model: Type[T]) -> T:
@@ -13,18 +13,8 @@ def to_flat_model[T: pydantic.BaseModel](py_obj: pydantic.BaseModel, flat_model:
     For each target flat field (recognized by field json_schema_extra "json" key),
     the source field is converted into json represented string.
     """
-    def convert_to_json(key: str, value: Any) -> str:
-        return _build_field_model(py_obj.__class__, key)(value).model_dump_json()
-
     assert isinstance(py_obj, pydantic.BaseModel), f"py_obj={repr(py_obj)} must be a pydantic.BaseModel class/subclass"
-    validate_flat_pydantic_model(flat_model)
-    flat_dict = dict({})
-    for key, value in py_obj.model_dump().items():
-        if is_json_str_field(flat_model.model_fields[key]):
-            flat_dict[key] = convert_to_json(key, value)
-        else:
-            flat_dict[key] = value
-    return flat_model(**flat_dict)
+    return get_converter(py_obj.__class__, flat_model).to_flat(py_obj)
 
 
 def from_flat_model[T: pydantic.BaseModel](flat_obj: pydantic.BaseModel, py_model: Type[T]) -> T:
@@ -33,28 +23,166 @@ def from_flat_model[T: pydantic.BaseModel](flat_obj: pydantic.BaseModel, py_mode
     For each source field that was flattened (recognized by field's json_schema_extra "json" key),
     the target field is loaded and built from the source json string field.
     """
-    def load_from_json(field_name: str, value: Any) -> Any:
-        return _build_field_model(py_model, field_name).model_validate_json(value).root
+    assert isinstance(flat_obj, pydantic.BaseModel), f"flat_obj={repr(flat_obj)} must be a pydantic.BaseModel class/subclass"
+    return get_converter(py_model, flat_obj.__class__).from_flat(flat_obj)
 
-    class Undefined:
-        pass
 
-    assert isinstance(flat_obj, pydantic.BaseModel), f"flat_obj={repr(flat_obj)} must be a pydantic.BaseModel class/subclass"
-    py_dict: dict[str, Any] = {}
-    for field_name, py_field_info in py_model.model_fields.items():
-        flat_field = getattr(flat_obj, field_name, Undefined)
-        if flat_field == Undefined:
-            continue
-        if is_json_str_field(flat_obj.model_fields[field_name]):
-            py_dict[field_name] = load_from_json(field_name, flat_field)
+class FlatConverter[P: pydantic.BaseModel, F: pydantic.BaseModel]:
+    """
+    Conversion plan between a pydantic model and its flat model.
+    All the per-model work (flat model validation, fields split & json TypeAdapters creation) is done once,
+    so converting an object only uses the precomputed plan.
+    Use get_converter() to get the cached plan of a models pair.
+    """
+    def __init__(self, py_model: type[P], flat_model: type[F]):
+        validate_flat_pydantic_model(flat_model)
+        self.py_model = py_model
+        self.flat_model = flat_model
+        self.field_names: tuple[str, ...] = tuple(name for name in py_model.model_fields if name in flat_model.model_fields)
+        self.json_field_names: tuple[str, ...] = tuple(
+            name for name in self.field_names if is_json_str_field(flat_model.model_fields[name])
+        )
+        self.flat_field_names: tuple[str, ...] = tuple(name for name in self.field_names if name not in self.json_field_names)
+        self.json_adapters: dict[str, pydantic.TypeAdapter] = {
+            name: pydantic.TypeAdapter(py_model.model_fields[name].annotation) for name in self.json_field_names
+        }
+        self._flat_field_names_set = set(self.flat_field_names)
+        self._field_names_set = set(self.field_names)
+        self._json_serializers = [(name, adapter.serializer) for name, adapter in self.json_adapters.items()]
+        self._dump_flat_values_as_is = not has_custom_serializers(py_model, self.flat_field_names)
+        self._is_lazy = issubclass(py_model, LazyJsonMixin)
+
+    def to_flat_dict(self, py_obj: P) -> dict[str, Any]:
+        """
+        Flat field values are taken as is (model_dump would return the same values), unless py_model has custom serializers.
+        JSON fields are serialized straight from their values, or reused as is for lazy fields which were never loaded.
+        """
+        if self._dump_flat_values_as_is:
+            values = instance_dict(py_obj)
+            flat_dict = {name: values[name] for name in self.flat_field_names}
         else:
-            py_dict[field_name] = flat_field
-    return py_model(**py_dict)
+            flat_dict = py_obj.model_dump(include=self._flat_field_names_set)
+        raw_json_values = lazy_json_values(py_obj) if self._is_lazy else {}
+        for name, serializer in self._json_serializers:
+            flat_dict[name] = raw_json_values[name] if name in raw_json_values else serializer.to_json(getattr(py_obj, name)).decode()
+        return flat_dict
+
+    def to_flat(self, py_obj: P) -> F:
+        return self.flat_model(**self.to_flat_dict(py_obj))
+
+    def from_flat_dict(self, flat_dict: dict[str, Any]) -> P:
+        py_dict = {name: flat_dict[name] for name in self.flat_field_names}
+        for name, adapter in self.json_adapters.items():
+            py_dict[name] = adapter.validate_json(flat_dict[name])
+        return self.py_model(**py_dict)
+
+    def from_flat(self, flat_obj: F) -> P:
+        return self.from_flat_dict({name: getattr(flat_obj, name) for name in self.field_names})
+
+    def from_flat_columns(self, columns: dict[str, Sequence[Any]], trusted: bool = False) -> list[P]:
+        """
+        Returns py_model instances from a batch of flat rows, given column-wise ({field name: column values}).
+        Each JSON column is decoded by a single validate_json call (of all its values as one JSON list),
+        and all the instances are validated by a single TypeAdapter(list[py_model]) call.
+        If trusted is set (the rows were validated when written), the instances are built by model_construct
+        instead, without validation: validators don't run, and flat values are kept as they are.
+        """
+        py_columns = [
+            self._decode_json_column(name, columns[name]) if name in self.json_adapters else columns[name]
+            for name in self.field_names
+        ]
+        py_dicts = [dict(zip(self.field_names, values)) for values in zip(*py_columns)]
+        if trusted:
+            return [self._construct(py_dict) for py_dict in py_dicts]
+        return self._py_models_adapter.validate_python(py_dicts)
+
+    def _construct(self, py_dict: dict[str, Any]) -> P:
+        """
+        Same as py_model.model_construct(**py_dict) of all the py_model fields, without its per-field default handling,
+        when py_model has no extra / private attributes or post init to set up.
+        """
+        if not self._is_plain_model:
+            return self.py_model.model_construct(set(self.field_names), **py_dict)
+        instance = self.py_model.__new__(self.py_model)
+        object.__setattr__(instance, "__dict__", py_dict)
+        object.__setattr__(instance, "__pydantic_fields_set__", set(self.field_names))
+        object.__setattr__(instance, "__pydantic_extra__", None)
+        object.__setattr__(instance, "__pydantic_private__", None)
+        return instance
+
+    def from_flat_columns_lazy(self, columns: dict[str, Sequence[Any]], trusted: bool = False) -> list[P]:
+        """
+        Returns lazy py_model instances (see from_flat_dict_lazy) from a batch of flat rows, given column-wise.
+        If trusted is set, the flat fields are not validated either.
+        """
+        return [
+            self.from_flat_dict_lazy(dict(zip(self.field_names, values)), trusted)
+            for values in zip(*(columns[name] for name in self.field_names))
+        ]
 
+    def _decode_json_column(self, name: str, json_values: Sequence[str]) -> list[Any]:
+        return self._json_list_adapters[name].validate_json(f"[{','.join(json_values)}]")
 
-def _build_field_model(py_model: type[pydantic.BaseModel], field_name: str) -> type[pydantic.RootModel]:
-    # Uses pydantic.RootModel to convert to/from json
-    return pydantic.RootModel[py_model.model_fields[field_name].annotation]
+    def from_flat_dict_lazy(self, flat_dict: dict[str, Any], trusted: bool = False) -> P:
+        """
+        Returns a lazy py_model instance (see lazy_json.LazyJsonMixin): only the flat fields are validated
+        (unless trusted is set), the JSON fields are validated on first access.
+        """
+        flat_values = {name: flat_dict[name] for name in self.flat_field_names}
+        if not trusted:
+            flat_values = self._flat_fields_model.model_validate(flat_values).__dict__
+        raw_json_values = {name: flat_dict[name] for name in self.json_field_names}
+        return new_lazy_instance(self._lazy_model, flat_values, raw_json_values, self._field_names_set)
+
+    @cached_property
+    def _flat_fields_model(self) -> type[pydantic.BaseModel]:
+        # Validates the flat fields of py_model only
+        return pydantic.create_model(
+            f"{self.py_model.__name__}FlatFields",
+            **{name: (self.py_model.model_fields[name].annotation, self.py_model.model_fields[name]) for name in self.flat_field_names},
+        )
+
+    @cached_property
+    def _is_plain_model(self) -> bool:
+        return (
+            set(self.field_names) == set(self.py_model.model_fields)
+            and self.py_model.model_config.get("extra") != "allow"
+            and not self.py_model.__pydantic_post_init__
+            and not self.py_model.__pydantic_root_model__
+        )
+
+    @cached_property
+    def _json_list_adapters(self) -> dict[str, pydantic.TypeAdapter]:
+        return {name: pydantic.TypeAdapter(list[self.py_model.model_fields[name].annotation]) for name in self.json_field_names}
+
+    @cached_property
+    def _py_models_adapter(self) -> pydantic.TypeAdapter:
+        return pydantic.TypeAdapter(list[self.py_model])
+
+    @cached_property
+    def _lazy_model(self) -> type[P]:
+        return get_lazy_model(self.py_model, tuple(self.json_adapters.items()))
+
+
+@cache
+def get_converter[P: pydantic.BaseModel, F: pydantic.BaseModel](py_model: type[P], flat_model: type[F]) -> FlatConverter[P, F]:
+    """
+    Returns the conversion plan of py_model & flat_model pair. It is built on first use and cached.
+    """
+    return FlatConverter(py_model, flat_model)
+
+
+def has_custom_serializers(py_model: type[pydantic.BaseModel], field_names: tuple[str, ...]) -> bool:
+    """
+    Returns True if py_model has a model serializer, or a field serializer (decorator or annotation) of field_names.
+    """
+    decorators = py_model.__pydantic_decorators__
+    return bool(decorators.model_serializers) or any(
+        set(decorator.info.fields) & {*field_names, "*"} for decorator in decorators.field_serializers.values()
+    ) or any(
+        isinstance(metadata, (pydantic.PlainSerializer, pydantic.WrapSerializer))
+        for name in field_names for metadata in py_model.model_fields[name].metadata
+    )
 
 
 def is_json_str_field(field_info: pydantic.fields.FieldInfo) -> bool:
@@ -0,0 +1,143 @@
+from functools import cache
+from typing import Any, Iterable, Optional
+
+import pydantic
+
+
+_INSTANCE_DICT = pydantic.BaseModel.__dict__["__dict__"]
+# The __dict__ slot of pydantic models, read directly since LazyJsonMixin.__dict__ loads the lazy fields first
+
+
+class LazyJsonMixin:
+    """
+    Base of the lazy subclasses of pydantic models (see get_lazy_model).
+    Their flattened (JSON) fields are kept as the raw JSON strings read from the DB, and are only validated
+    into their annotated types on first access (then stored as regular field values).
+    Field validators of the lazy fields & model validators don't run on lazy instances.
+    A lazy field that was never accessed keeps its raw JSON, which is written back as is (see lazy_json_values).
+    Reading the instance __dict__ loads all its lazy fields first, so does anything reading it: dumping the instance
+    (by itself, nested in another model or by a TypeAdapter, since pydantic-core's serializer reads __dict__),
+    comparing, copying, pickling, printing & assigning its fields. The lazy_json module reads it by instance_dict instead.
+    """
+    __lazy_json_adapters__: dict[str, pydantic.TypeAdapter]
+    __lazy_base__: type[pydantic.BaseModel]
+
+    @property
+    def __dict__(self) -> dict[str, Any]:
+        self._load_lazy_json()
+        return instance_dict(self)
+
+    @__dict__.setter
+    def __dict__(self, values: dict[str, Any]) -> None:
+        _INSTANCE_DICT.__set__(self, values)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in lazy_json_values(self):
+            self._load_lazy_json([name])
+            return instance_dict(self)[name]
+        return super().__getattr__(name)
+
+    def _load_lazy_json(self, names: Optional[Iterable[str]] = None) -> None:
+        raw_values = lazy_json_values(self)
+        for name in list(raw_values) if names is None else [name for name in names if name in raw_values]:
+            instance_dict(self)[name] = self.__lazy_json_adapters__[name].validate_json(raw_values[name])
+            del self.__lazy_json_values__[name]
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, pydantic.BaseModel):
+            return NotImplemented
+        self._load_lazy_json()
+        if isinstance(other, LazyJsonMixin):
+            other._load_lazy_json()
+        return (
+            _base_model(self) is _base_model(other)
+            and self.__dict__ == other.__dict__
+            and self.__pydantic_private__ == other.__pydantic_private__
+            and self.__pydantic_extra__ == other.__pydantic_extra__
+        )
+
+    def __hash__(self) -> int:
+        self._load_lazy_json()
+        return super().__hash__()
+
+    def __copy__(self):
+        copied = super().__copy__()
+        object.__setattr__(copied, "__lazy_json_values__", dict(lazy_json_values(self)))
+        return copied
+
+    def __deepcopy__(self, memo: Optional[dict[int, Any]] = None):
+        copied = super().__deepcopy__(memo)
+        object.__setattr__(copied, "__lazy_json_values__", dict(lazy_json_values(self)))
+        return copied
+
+    def __reduce__(self) -> tuple:
+        # Pickled as a (fully loaded) instance of the base model, since the lazy subclass can't be imported by name
+        self._load_lazy_json()
+        return _restore_instance, (self.__lazy_base__, self.__getstate__())
+
+    def __repr_name__(self) -> str:
+        return self.__lazy_base__.__name__
+
+
+@cache
+def get_lazy_model[P: pydantic.BaseModel](py_model: type[P], json_adapters: tuple[tuple[str, pydantic.TypeAdapter], ...]) -> type[P]:
+    """
+    Returns the (cached) lazy subclass of py_model, whose json_adapters fields are decoded on first access.
+    """
+    return type(py_model)(
+        f"Lazy{py_model.__name__}",
+        (LazyJsonMixin, py_model),
+        {
+            "__module__": py_model.__module__,
+            "__qualname__": f"Lazy{py_model.__qualname__}",
+            "__slots__": ("__lazy_json_values__",),
+            "__lazy_json_adapters__": dict(json_adapters),
+            "__lazy_base__": py_model,
+            **({"__hash__": None} if py_model.__hash__ is None else {}),
+        },
+    )
+
+
+def new_lazy_instance[P: pydantic.BaseModel](
+        lazy_model: type[P],
+        values: dict[str, Any],
+        raw_json_values: dict[str, str],
+        fields_set: set[str],
+) -> P:
+    """
+    Returns a lazy_model instance of already validated values, and the raw JSON strings of its lazy fields.
+    """
+    instance = lazy_model.model_construct(fields_set, **values)
+    for name in raw_json_values:
+        instance_dict(instance).pop(name, None)  # Set by model_construct to the field default
+    object.__setattr__(instance, "__lazy_json_values__", raw_json_values)
+    return instance
+
+
+def lazy_json_values(py_obj: pydantic.BaseModel) -> dict[str, str]:
+    """
+    Returns the raw JSON strings of py_obj fields which were not loaded yet (empty for regular instances).
+    """
+    try:
+        raw_values = object.__getattribute__(py_obj, "__lazy_json_values__")
+    except AttributeError:
+        return {}
+    values = instance_dict(py_obj)
+    return {name: raw for name, raw in raw_values.items() if name not in values}
+
+
+def instance_dict(py_obj: pydantic.BaseModel) -> dict[str, Any]:
+    """
+    Returns the field values of py_obj, without loading its lazy fields (the lazy fields which were not loaded yet are missing).
+    """
+    return _INSTANCE_DICT.__get__(py_obj)
+
+
+def _restore_instance[P: pydantic.BaseModel](py_model: type[P], state: dict[Any, Any]) -> P:
+    instance = py_model.__new__(py_model)
+    instance.__setstate__(state)
+    return instance
+
+
+def _base_model(py_obj: pydantic.BaseModel) -> type[pydantic.BaseModel]:
+    return py_obj.__lazy_base__ if isinstance(py_obj, LazyJsonMixin) else py_obj.__class__
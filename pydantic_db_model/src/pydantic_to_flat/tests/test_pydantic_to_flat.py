@@ -70,8 +70,46 @@ def test_pydantic_to_flat(py_obj: pydantic.BaseModel):
     assert converted_back_py_obj == py_obj
 
 
+def test_converter_is_cached():
+    flat_model = create_flat_model(NestedPydanticModel)
+    converter = convert.get_converter(NestedPydanticModel, flat_model)
+    assert convert.get_converter(NestedPydanticModel, flat_model) is converter
+    assert converter.json_field_names == ("btm", "d")
+    assert converter.flat_field_names == ()
+
+
+class CustomSerializerModel(pydantic.BaseModel):
+    s: str = "text"
+    l: list[int] = [1, 2]
+
+    @pydantic.field_serializer("s")
+    def upper_s(self, s: str) -> str:
+        return s.upper()
+
+
+@pytest.mark.parametrize(
+    "py_obj, flat_values_as_is",
+    [(BasicTypesModel(f=0.1), True), (SupportedExtraTypesModel(dt=datetime.now()), True), (CustomSerializerModel(), False)],
+)
+def test_to_flat_dict(py_obj: pydantic.BaseModel, flat_values_as_is: bool):
+    converter = convert.get_converter(py_obj.__class__, create_flat_model(py_obj.__class__))
+    assert converter._dump_flat_values_as_is == flat_values_as_is
+    expected_flat_dict = py_obj.model_dump(include=set(converter.flat_field_names)) | {
+        name: adapter.dump_json(getattr(py_obj, name)).decode() for name, adapter in converter.json_adapters.items()
+    }
+    assert converter.to_flat_dict(py_obj) == expected_flat_dict
+
+
+def test_from_flat_columns():
+    py_objs = [NestedPydanticModel(), NestedPydanticModel(btm=BasicTypesModel(f=1.5, by=b"x"), d={})]
+    converter = convert.get_converter(NestedPydanticModel, create_flat_model(NestedPydanticModel))
+    flat_dicts = [converter.to_flat_dict(py_obj) for py_obj in py_objs]
+    columns = {name: [flat_dict[name] for flat_dict in flat_dicts] for name in converter.field_names}
+    assert converter.from_flat_columns(columns) == py_objs
+    assert converter.from_flat_columns({name: [] for name in converter.field_names}) == []
+
+
 def print_model(model: type[pydantic.BaseModel]) -> None:
     print(f"\n{model.__name__}:")
     for field_name, field_info in model.model_fields.items():
         print(f"{field_name}: {field_info.annotation}, extra={field_info.json_schema_extra}")
-
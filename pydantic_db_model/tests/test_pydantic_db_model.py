@@ -1,4 +1,6 @@
+import copy
 import enum
+import pickle
 import uuid
 from datetime import datetime
 from typing import Optional
@@ -6,9 +8,15 @@ from zoneinfo import ZoneInfo
 
 import pydantic
 import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
 from sqlmodel import Field
 
-from pydantic_db_model.src.pydantic_db_model import pydantic_to_db_model, db_model_to_pydantic, generate_db_model
+from pydantic_db_model.src.db_index.db_index import DbIndex
+from pydantic_db_model.src.fix_missing_timezone.fix_missing_timezone import set_missing_timezone_in_model
+from pydantic_db_model.src.pydantic_db_model import pydantic_to_db_model, db_model_to_pydantic, generate_db_model, pydantic_to_db_dict, \
+    db_models_to_pydantic, db_rows_to_pydantic, db_select_columns
+from pydantic_db_model.src.pydantic_to_flat.src.lazy_json import lazy_json_values
 
 
 class BasicTypesModel(pydantic.BaseModel):
@@ -53,6 +61,15 @@ class NestedPydanticModel(pydantic.BaseModel):
     }
 
 
+class LazyNestedModel(pydantic.BaseModel):
+    key: Optional[int] = Field(default=None, primary_key=True)
+    btm: BasicTypesModel = BasicTypesModel(f=0)
+    l: list[int] = []
+
+
+generate_db_model(LazyNestedModel, lazy_json=True)
+
+
 @pytest.mark.parametrize(
     "py_obj",
     test_objects := [
@@ -114,6 +131,89 @@ def test_conflicting_fixed_timezone(py_obj: pydantic.BaseModel, fixed_timezone:
     print(f"{repr(e)} raised as expected")
 
 
+def test_fixed_timezone_batch():
+    class FixedTimezoneBatchModel(pydantic.BaseModel):
+        key: int = Field(primary_key=True)
+        dt1: datetime
+        dt2: Optional[datetime] = None
+
+    generate_db_model(FixedTimezoneBatchModel, "America/Los_Angeles")
+    db_model = FixedTimezoneBatchModel.__db_model__
+    tz = ZoneInfo("America/Los_Angeles")
+    naive_dt = datetime(2024, 1, 1, 12)
+    # Naive datetimes, as read from a DB without timezone support (e.g. SQLite)
+    db_objs = [db_model(key=1, dt1=naive_dt, dt2=None), db_model(key=2, dt1=naive_dt, dt2=naive_dt.replace(tzinfo=ZoneInfo("UTC")))]
+    assert db_models_to_pydantic(db_objs) == [
+        FixedTimezoneBatchModel(key=1, dt1=naive_dt.replace(tzinfo=tz)),
+        FixedTimezoneBatchModel(key=2, dt1=naive_dt.replace(tzinfo=tz), dt2=naive_dt.replace(tzinfo=ZoneInfo("UTC"))),
+    ]
+    assert db_models_to_pydantic([]) == []
+
+    db_obj = db_model(key=3, dt1=naive_dt)
+    set_missing_timezone_in_model(db_obj, tz)
+    assert db_obj.dt1 == naive_dt.replace(tzinfo=tz) and db_obj.dt2 is None
+
+
+def test_db_rows_to_pydantic():
+    py_objs = [LazyNestedModel(key=1, l=[1]), LazyNestedModel(key=2, btm=BasicTypesModel(f=2.5))]
+    db_model = LazyNestedModel.__db_model__
+    columns = db_select_columns(db_model)
+    assert [column.name for column in columns] == ["key", "btm", "l"]
+    rows = [tuple(pydantic_to_db_dict(py_obj)[column.name] for column in columns) for py_obj in py_objs]
+    records = db_rows_to_pydantic(db_model, rows)
+    assert all(lazy_json_values(record) for record in records)
+    assert records == py_objs
+
+
+def test_db_indexes():
+    class DbIndexesModel(pydantic.BaseModel):
+        __db_indexes__ = [DbIndex("s", "i"), DbIndex(("d", "k", 0), name="ix_d_k", unique=True)]
+        key: Optional[int] = Field(default=None, primary_key=True)
+        s: str = ""
+        i: int = 0
+        d: dict[str, list[int]] = {}
+
+    generate_db_model(DbIndexesModel)
+    indexes = {index.name: index for index in DbIndexesModel.__db_model__.__table__.indexes}
+    assert [column.name for column in indexes["ix_DbIndexesModel_s_i"].columns] == ["s", "i"]
+    assert indexes["ix_d_k"].unique
+    assert str(indexes["ix_d_k"].expressions[0].compile()) == """json_extract("DbIndexesModel".d, '$."k"[0]')"""
+    assert str(CreateIndex(indexes["ix_d_k"]).compile(dialect=postgresql.dialect())) == (
+        """CREATE UNIQUE INDEX ix_d_k ON "DbIndexesModel" ((CAST(d AS JSONB) #>> '{k,0}'))"""
+    )
+
+
+def test_lazy_json():
+    py_obj = LazyNestedModel(key=1, l=[1, 2])
+    db_obj = pydantic_to_db_model(py_obj)
+    lazy_obj = db_model_to_pydantic(db_obj)
+    assert isinstance(lazy_obj, LazyNestedModel)
+    assert lazy_json_values(lazy_obj) == {"btm": db_obj.btm, "l": db_obj.l}
+    assert lazy_obj.l == [1, 2]
+    assert lazy_json_values(lazy_obj) == {"btm": db_obj.btm}
+    lazy_obj.l.append(3)
+    assert pydantic_to_db_dict(lazy_obj) == {"key": 1, "btm": db_obj.btm, "l": "[1,2,3]"}
+    assert lazy_json_values(lazy_obj) == {"btm": db_obj.btm}  # Written back as is
+
+    lazy_obj = db_model_to_pydantic(db_obj)
+    assert copy.deepcopy(lazy_obj) == py_obj
+    assert pickle.loads(pickle.dumps(db_model_to_pydantic(db_obj))) == py_obj
+    assert repr(db_model_to_pydantic(db_obj)) == repr(py_obj)
+    assert db_model_to_pydantic(db_obj).model_dump() == py_obj.model_dump()
+    assert py_obj == lazy_obj == py_obj
+
+
+def test_lazy_json_nested_dump():
+    class LazyWrapper(pydantic.BaseModel):
+        items: list[LazyNestedModel]
+
+    py_obj = LazyNestedModel(key=1, l=[1, 2])
+    db_obj = pydantic_to_db_model(py_obj)
+    assert pydantic.TypeAdapter(list[LazyNestedModel]).dump_json([db_model_to_pydantic(db_obj)]) == f"[{py_obj.model_dump_json()}]".encode()
+    assert LazyWrapper(items=[db_model_to_pydantic(db_obj)]).model_dump() == LazyWrapper(items=[py_obj]).model_dump()
+    assert LazyWrapper(items=[db_model_to_pydantic(db_obj)]).model_dump_json() == LazyWrapper(items=[py_obj]).model_dump_json()
+
+
 def print_model(flat_model: type[pydantic.BaseModel]) -> None:
     print(f"\n{flat_model.__name__}: (fixed_timezone={flat_model.__fixed_timezone__})")
     for field_name, field_info in flat_model.model_fields.items():